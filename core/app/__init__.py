@@ -1,12 +1,51 @@
-from flask import Flask
+import click
+from flask import Flask, redirect, url_for
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_cors import CORS
+from .cli import LazyAppGroup
 from .config import config
-from .extensions import db, bcrypt, login_manager, csrf, migrate
+from .database import init_engines, prepare_schema
+from .extensions import (
+    db,
+    login_manager,
+    csrf,
+    hashing_pool,
+    password_hasher,
+    admission,
+    identity_cache,
+    static_assets,
+    fragment_cache,
+    log_pipeline,
+)
+from .hashing import PasswordHashingBusy
+from .serialization import FastJSONProvider
+
+CLI_COMMANDS = {
+    name: f"core.app.commands:{name}_cli"
+    for name in (
+        "points",
+        "passwords",
+        "families",
+        "json",
+        "assets",
+        "database",
+        "startup",
+        "server",
+    )
+}
 
 
 def create_app(config_name="default"):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    # CLI commands are imported on first use
+    app.cli = LazyAppGroup(app.name, lazy_commands=CLI_COMMANDS)
+    app.json = FastJSONProvider(app)
+    log_pipeline.init_app(app)
+
+    hops = app.config["TRUSTED_PROXY_HOPS"]
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
 
     # Enable CORS for API access from React frontend
     CORS(app, supports_credentials=True, origins=["http://localhost:3000"])
@@ -17,10 +56,23 @@ def create_app(config_name="default"):
 
     # Initialize extensions with the app
     db.init_app(app)
-    bcrypt.init_app(app)
-    migrate.init_app(app, db)
+    init_engines(app, db)
+    # Flask-Migrate imports Alembic, which only the `flask db` commands need;
+    # skipping it keeps worker startup fast
+    cli = click.get_current_context(silent=True) is not None
+    if cli:
+        from flask_migrate import Migrate
+
+        Migrate(app, db)
     login_manager.init_app(app)
     csrf.init_app(app)
+    hashing_pool.init_app(app)
+    password_hasher.init_app(app)
+    admission.init_app(app)
+    identity_cache.init_app(app, db.session)
+    # `flask assets build` itself runs before any build exists
+    static_assets.init_app(app, warn_missing=not cli)
+    fragment_cache.init_app(app)
 
     # API routes use @CSRFProtect.exempt decorator individually
 
@@ -32,15 +84,47 @@ def create_app(config_name="default"):
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(parent, url_prefix="/parent")
     app.register_blueprint(child, url_prefix="/child")
+    # The operator API 404s without a token, so it is only loaded when enabled
+    if app.config["ADMIN_API_TOKEN"]:
+        from .blueprints.admin import admin
+
+        app.register_blueprint(admin, url_prefix="/admin")
+
+    @app.route("/", methods=["GET"])
+    def landing():
+        return redirect(url_for("auth.login"))
+
+    from .metrics import metrics_bp, register_metrics
+
+    app.register_blueprint(metrics_bp)
+    register_metrics("password_hashing", hashing_pool.stats)
+    register_metrics("admission_control", admission.stats)
+    register_metrics("identity_cache", identity_cache.stats)
+    register_metrics("templates", fragment_cache.stats)
+    register_metrics("logging", log_pipeline.stats)
 
     # API routes are now integrated into the main route files
 
     # User loader function
     from .models.user import User
+    from .models.parent_code import (
+        parent_code_allocator,
+        parent_code_lookup,
+        register_parent_code_events,
+    )
+
+    parent_code_allocator.init_app(app)
+    parent_code_lookup.init_app(app)
+    register_parent_code_events(db.session)
+
+    from .models.family_version import register_family_version_events
+
+    register_family_version_events(db.session)
+    register_metrics("parent_code_lookup", parent_code_lookup.stats)
 
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return identity_cache.load(db.session, User, int(user_id))
 
     # API error handlers
     @app.errorhandler(404)
@@ -59,8 +143,14 @@ def create_app(config_name="default"):
     def api_forbidden(error):
         return {"success": False, "message": "Access forbidden"}, 403
 
-    # Initialize the database tables
-    with app.app_context():
-        db.create_all()
+    @app.errorhandler(PasswordHashingBusy)
+    def api_hashing_busy(error):
+        return (
+            {"success": False, "message": "Server is busy, please retry shortly"},
+            503,
+            {"Retry-After": str(error.retry_after)},
+        )
+
+    prepare_schema(app, db)
 
     return app
@@ -0,0 +1,285 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import shutil
+from flask import current_app, request, send_from_directory
+
+DIST_FOLDER = "dist"
+MANIFEST_NAME = "manifest.json"
+
+# Characters a CSS whitespace run can be dropped next to. A leading ":" is
+# kept (``a :hover`` differs from ``a:hover``) and "+" is kept for calc().
+_CSS_TIGHT_BEFORE = set("{};,>)")
+_CSS_TIGHT_AFTER = set("{};,>(:")
+
+# After these characters a "/" in JavaScript starts a regex literal
+_JS_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+_JS_REGEX_KEYWORDS = ("return", "typeof", "case", "do", "else", "in", "of")
+
+
+def _is_word(char):
+    return char.isalnum() or char in "_$\\" or ord(char) > 127
+
+
+def _read_string(source, start):
+    """Return the index just past the quoted string starting at start"""
+    quote = source[start]
+    index = start + 1
+    while index < len(source) and source[index] != quote:
+        index += 2 if source[index] == "\\" else 1
+    return index + 1
+
+
+def minify_css(source):
+    """Strip comments and redundant whitespace from a stylesheet"""
+    out = []
+    pending_space = False
+    index = 0
+    while index < len(source):
+        char = source[index]
+        if source.startswith("/*", index):
+            end = source.find("*/", index + 2)
+            index = len(source) if end == -1 else end + 2
+            pending_space = True
+            continue
+        if char.isspace():
+            pending_space = True
+            index += 1
+            continue
+        if pending_space and out:
+            if out[-1] not in _CSS_TIGHT_AFTER and char not in _CSS_TIGHT_BEFORE:
+                out.append(" ")
+        pending_space = False
+        if char in "\"'":
+            end = _read_string(source, index)
+            out.append(source[index:end])
+            index = end
+            continue
+        if char == "}" and out and out[-1] == ";":
+            out.pop()
+        out.append(char)
+        index += 1
+    return "".join(out)
+
+
+def minify_js(source):
+    """Strip comments and indentation from a script.
+
+    Deliberately conservative: strings, template literals and regex literals
+    are copied verbatim, and line breaks are kept wherever whitespace held one
+    so automatic semicolon insertion is unaffected.
+    """
+    out = []
+    pending = ""
+    # Brace depth of each ${...} currently open inside a template literal
+    template_stack = []
+    index = 0
+    length = len(source)
+
+    def last_word():
+        end = len(out)
+        start = end
+        while start > 0 and len(out[start - 1]) == 1 and _is_word(out[start - 1]):
+            start -= 1
+        return "".join(out[start:end])
+
+    def copy_template(index):
+        """Copy template text from index; returns (index, opened_expression)"""
+        start = index
+        while index < length:
+            char = source[index]
+            if char == "\\":
+                index += 2
+            elif char == "`":
+                out.append(source[start : index + 1])
+                return index + 1, False
+            elif source.startswith("${", index):
+                out.append(source[start : index + 2])
+                return index + 2, True
+            else:
+                index += 1
+        out.append(source[start:])
+        return length, False
+
+    while index < length:
+        char = source[index]
+        if source.startswith("//", index) or source.startswith("/*", index):
+            if source[index + 1] == "/":
+                end = source.find("\n", index)
+                index = length if end == -1 else end
+            else:
+                end = source.find("*/", index + 2)
+                comment = source[index : length if end == -1 else end + 2]
+                index = length if end == -1 else end + 2
+                pending = "\n" if "\n" in comment or pending == "\n" else " "
+            continue
+        if char.isspace():
+            if char == "\n" or pending == "\n":
+                pending = "\n"
+            else:
+                pending = " "
+            index += 1
+            continue
+
+        if pending and out:
+            previous = out[-1][-1]
+            if pending == "\n" and previous != "\n":
+                out.append("\n")
+            elif (_is_word(previous) and _is_word(char)) or (
+                previous in "+-" and char == previous
+            ):
+                out.append(" ")
+        pending = ""
+
+        if char in "\"'":
+            end = _read_string(source, index)
+            out.append(source[index:end])
+            index = end
+        elif char == "`":
+            out.append("`")
+            index, opened = copy_template(index + 1)
+            if opened:
+                template_stack.append(0)
+        elif char == "}" and template_stack and template_stack[-1] == 0:
+            template_stack.pop()
+            out.append("}")
+            index, opened = copy_template(index + 1)
+            if opened:
+                template_stack.append(0)
+        elif char == "/" and (
+            not out
+            or out[-1][-1] in _JS_REGEX_PRECEDERS
+            or out[-1][-1] == "\n"
+            or last_word() in _JS_REGEX_KEYWORDS
+        ):
+            end = index + 1
+            in_class = False
+            while end < length and (in_class or source[end] != "/"):
+                if source[end] == "\\":
+                    end += 1
+                elif source[end] == "[":
+                    in_class = True
+                elif source[end] == "]":
+                    in_class = False
+                end += 1
+            end += 1
+            while end < length and _is_word(source[end]):
+                end += 1
+            out.append(source[index:end])
+            index = end
+        else:
+            if template_stack and char in "{}":
+                template_stack[-1] += 1 if char == "{" else -1
+            out.append(char)
+            index += 1
+    return "".join(out).strip() + "\n"
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+def build_assets(static_folder):
+    """Minify, fingerprint and gzip every stylesheet and script.
+
+    Output goes to ``<static>/dist``, replacing any previous build, with a
+    manifest mapping source names to fingerprinted ones. Returns
+    ``(source, built, raw_size, minified_size, gzip_size)`` per asset.
+    """
+    dist = os.path.join(static_folder, DIST_FOLDER)
+    shutil.rmtree(dist, ignore_errors=True)
+    manifest = {}
+    report = []
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist)
+        for name in sorted(files):
+            stem, ext = os.path.splitext(name)
+            if ext not in MINIFIERS:
+                continue
+            path = os.path.join(root, name)
+            source = os.path.relpath(path, static_folder).replace(os.sep, "/")
+            with open(path, encoding="utf-8") as f:
+                raw = f.read()
+            data = MINIFIERS[ext](raw).encode("utf-8")
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            built = posixpath.join(
+                DIST_FOLDER, posixpath.dirname(source), f"{stem}.{digest}{ext}"
+            )
+
+            target = os.path.join(static_folder, built)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(data)
+            # mtime=0 keeps the compressed bytes reproducible between builds
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            with open(target + ".gz", "wb") as f:
+                f.write(compressed)
+
+            manifest[source] = built
+            report.append(
+                (source, built, len(raw.encode("utf-8")), len(data), len(compressed))
+            )
+
+    os.makedirs(dist, exist_ok=True)
+    with open(os.path.join(dist, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return report
+
+
+class StaticAssets:
+    """Serve the fingerprinted build of the static files when one exists.
+
+    ``url_for("static", filename=...)`` is rewritten to the fingerprinted
+    name from the manifest, so templates need no changes. Fingerprinted files
+    are served gzip-precompressed when the client accepts it, with far-future
+    immutable caching; everything else goes through the normal static view.
+    """
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        self.fingerprinted = frozenset()
+        self.max_age = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, warn_missing=True):
+        self.max_age = app.config["STATIC_ASSETS_MAX_AGE"]
+        self.manifest = {}
+        if app.config["STATIC_ASSETS_ENABLED"]:
+            path = os.path.join(app.static_folder, DIST_FOLDER, MANIFEST_NAME)
+            try:
+                with open(path) as f:
+                    self.manifest = json.load(f)
+            except FileNotFoundError:
+                if warn_missing:
+                    app.logger.warning(
+                        "No static asset build found; run `flask assets build`"
+                    )
+        self.fingerprinted = frozenset(self.manifest.values())
+        app.url_defaults(self.fingerprint_url)
+        app.view_functions["static"] = self.send_static
+
+    def fingerprint_url(self, endpoint, values):
+        if endpoint == "static" and values.get("filename") in self.manifest:
+            values["filename"] = self.manifest[values["filename"]]
+
+    def send_static(self, filename):
+        if filename not in self.fingerprinted:
+            return current_app.send_static_file(filename)
+
+        mimetype = mimetypes.guess_type(filename)[0]
+        gzipped = request.accept_encodings["gzip"] > 0
+        response = send_from_directory(
+            current_app.static_folder,
+            filename + ".gz" if gzipped else filename,
+            mimetype=mimetype,
+            max_age=self.max_age,
+        )
+        if gzipped:
+            response.headers["Content-Encoding"] = "gzip"
+        response.vary.add("Accept-Encoding")
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
@@ -0,0 +1,5 @@
+# Import the blueprint instance from routes
+from .routes import admin
+
+# No need to create a new blueprint instance here
+__all__ = ["admin"]
@@ -0,0 +1,90 @@
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
+from core.app.extensions import csrf
+from core.app.family_export import EXPORTS, render_export
+from core.app.family_import import import_families, read_rows
+from core.app.utils.decorators import admin_token_required
+import logging
+
+logger = logging.getLogger(__name__)
+
+admin = Blueprint("admin", __name__)
+
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+}
+
+
+# =============================================================================
+# API ROUTES - Operator endpoints, authenticated with ADMIN_API_TOKEN
+# =============================================================================
+
+
+@admin.route("/api/import", methods=["POST"])
+@csrf.exempt
+@admin_token_required
+def api_import_families():
+    """Bulk-create parent and child accounts from a CSV or JSONL request body
+
+    The body is read as a stream, so large files use constant memory. The
+    format comes from ``?format=csv|jsonl`` or the Content-Type.
+    """
+    fmt = request.args.get("format") or IMPORT_CONTENT_TYPES.get(request.mimetype)
+    if fmt not in ("csv", "jsonl"):
+        return (
+            jsonify({"success": False, "message": "Format must be csv or jsonl"}),
+            400,
+        )
+
+    def log_progress(result):
+        logger.info(
+            "Import progress: %d processed, %d created, %d failed",
+            result.processed,
+            result.created,
+            result.failed,
+        )
+
+    try:
+        result = import_families(
+            read_rows(request.stream, fmt),
+            batch_size=current_app.config["IMPORT_BATCH_SIZE"],
+            progress=log_progress,
+        )
+    except UnicodeDecodeError:
+        return (
+            jsonify({"success": False, "message": "Body must be UTF-8 encoded"}),
+            400,
+        )
+    return jsonify({"success": True, "data": result.to_dict()}), 200
+
+
+@admin.route("/api/export/<kind>", methods=["GET"])
+@admin_token_required
+def api_export(kind):
+    """Stream every user or points ledger row as NDJSON (default) or CSV
+
+    Rows come in id order; pass the last id received as ``after_id`` to
+    resume an interrupted download.
+    """
+    if kind not in EXPORTS:
+        return jsonify({"success": False, "message": "Unknown export"}), 404
+
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in ("ndjson", "csv"):
+        return (
+            jsonify({"success": False, "message": "Format must be ndjson or csv"}),
+            400,
+        )
+
+    after_id = request.args.get("after_id", type=int)
+    body = render_export(kind, fmt, after_id, current_app.config["EXPORT_CHUNK_SIZE"])
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(stream_with_context(body), mimetype=mimetype)
@@ -8,7 +8,6 @@ from wtforms import (
     EmailField,
 )
 from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError
-from core.app.models.user import User
 
 
 class LoginForm(FlaskForm):
@@ -53,23 +52,8 @@ class RegistrationForm(FlaskForm):
     )  # Only required for child registration
     submit = SubmitField("Register")
 
-    def validate_username(self, username):
-        user = User.query.filter_by(username=username.data).first()
-        if user:
-            raise ValidationError("Username already taken.")
-
-    def validate_email(self, email):
-        user = User.query.filter_by(email=email.data).first()
-        if user:
-            raise ValidationError("Email already registered.")
-
+    # Uniqueness and the parent code itself are checked by register_user()
+    # in one query, so only checks that need no database live here
     def validate_parent_code(self, parent_code):
         if self.role.data == "child" and not parent_code.data:
             raise ValidationError("Parent code is required for child registration")
-        if self.role.data == "child" and parent_code.data:
-            # Look for parent by parent_code field, not username
-            parent = User.query.filter_by(
-                parent_code=parent_code.data, role="parent"
-            ).first()
-            if not parent:
-                raise ValidationError("Invalid parent code")
@@ -0,0 +1,78 @@
+from sqlalchemy.exc import IntegrityError
+from core.app.extensions import db
+from core.app.models.user import User
+from core.app.models.parent_code import commit_with_parent_code_retry
+
+
+class RegistrationError(Exception):
+    """A registration request that cannot be fulfilled.
+
+    ``field`` names the offending form field and ``status_code`` is the HTTP
+    status the JSON API answers with.
+    """
+
+    def __init__(self, message, status_code, field=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.field = field
+
+
+def register_user(username, email, password, role, parent_code=None):
+    """Create and commit a parent or child account, returning the new User.
+
+    Conflicts and the child's parent are found with one combined lookup
+    before any password hashing. The insert itself is optimistic: the unique
+    constraints on username and email settle races with concurrent
+    registrations and surface as the same RegistrationError.
+    """
+    if role not in ("parent", "child"):
+        raise RegistrationError("Invalid role", 400, "role")
+    if role == "child" and not parent_code:
+        raise RegistrationError(
+            "Parent code is required for child registration", 400, "parent_code"
+        )
+
+    conditions = [User.username == username, User.email == email]
+    if role == "child":
+        conditions.append(
+            db.and_(User.parent_code == parent_code, User.role == "parent")
+        )
+    matches = db.session.execute(
+        db.select(User.id, User.username, User.email, User.parent_code).where(
+            db.or_(*conditions)
+        )
+    ).all()
+
+    parent_id = None
+    for match in matches:
+        if match.username == username:
+            raise _conflict("username")
+        if match.email == email:
+            raise _conflict("email")
+        if role == "child" and match.parent_code == parent_code:
+            parent_id = match.id
+
+    if role == "child" and parent_id is None:
+        raise RegistrationError("Invalid parent code", 400, "parent_code")
+
+    user = User(username=username, email=email, role=role, parent_id=parent_id)
+    user.set_password(password)
+
+    try:
+        commit_with_parent_code_retry(user)
+    except IntegrityError as e:
+        db.session.rollback()
+        message = str(e.orig)
+        if "username" in message:
+            raise _conflict("username") from e
+        if "email" in message:
+            raise _conflict("email") from e
+        raise
+    return user
+
+
+def _conflict(field):
+    if field == "username":
+        return RegistrationError("Username already exists", 409, "username")
+    return RegistrationError("Email already registered", 409, "email")
@@ -7,17 +7,21 @@ from flask import (
     jsonify,
 )
 from flask_login import login_user, logout_user, login_required, current_user
-from core.app.extensions import db, csrf
-from core.app.models.user import User
+from core.app.extensions import db, csrf, admission
+from core.app.database import use_primary
+from core.app.hashing import PasswordHashingBusy
+from core.app.models.user import User, serialize_user
+from core.app.models.parent_code import parent_code_lookup
+from core.app.utils.conditional import family_etag
 from . import auth_bp
+from .registration import RegistrationError, register_user
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 
 @auth_bp.route("/login", methods=["GET", "POST"])
+@admission.guard
 def login():
     if current_user.is_authenticated:
         if current_user.role == "parent":
@@ -29,10 +33,12 @@ def login():
         email = request.form.get("email")
         password = request.form.get("password")
 
-        logger.debug(f"Login attempt for email: {email}")
+        logger.debug("Login attempt for email: %s", email)
 
         user = User.query.filter_by(email=email).first()
         if user and user.check_password(password):
+            if user.upgrade_password_hash(password):
+                db.session.commit()
             login_user(user)
             next_page = request.args.get("next")
             return redirect(next_page if next_page else url_for("parent.dashboard"))
@@ -51,6 +57,7 @@ def logout():
 
 
 @auth_bp.route("/register", methods=["GET", "POST"])
+@admission.guard
 def register():
     from .forms import RegistrationForm
 
@@ -63,46 +70,24 @@ def register():
     form = RegistrationForm()
 
     if form.validate_on_submit():
-        # Get data from form
-        username = form.username.data
-        email = form.email.data
-        password = form.password.data
-        role = form.role.data
-        parent_code = form.parent_code.data
-
-        # Handle child registration - find parent
-        parent = None
-        if role == "child":
-            parent = User.query.filter_by(
-                parent_code=parent_code, role="parent"
-            ).first()
-            # This should not happen due to form validation, but double-check
-            if not parent:
-                flash("Invalid parent code", "error")
-                return render_template(
-                    "auth/register.html", form=form, body_class="auth-page"
-                )
-
-        # Create new user with explicit role
-        user = User(username=username, email=email, role=role)
-        user.set_password(password)
-
-        # Link child to parent if applicable
-        if role == "child" and parent:
-            user.parent_id = parent.id
-
         try:
-            db.session.add(user)
-            db.session.commit()
+            register_user(
+                form.username.data,
+                form.email.data,
+                form.password.data,
+                form.role.data,
+                form.parent_code.data,
+            )
             flash("Registration successful! Please log in.", "success")
             return redirect(url_for("auth.login"))
+        except RegistrationError as e:
+            form[e.field].errors.append(e.message)
+        except PasswordHashingBusy:
+            raise
         except Exception as e:
             db.session.rollback()
             flash("An error occurred during registration", "error")
-            logger.error(f"Registration error: {str(e)}")
-            return render_template(
-                "auth/register.html", form=form, body_class="auth-page"
-            )
+            logger.error("Registration error: %s", e)
 
     return render_template("auth/register.html", form=form, body_class="auth-page")
 
@@ -114,11 +99,12 @@ def register():
 
 @auth_bp.route("/api/login", methods=["POST"])
 @csrf.exempt
+@admission.guard
 def api_login():
     """API endpoint for user login"""
     try:
         data = request.get_json()
-        if not data:
+        if not isinstance(data, dict) or not data:
             return jsonify({"success": False, "message": "No data provided"}), 400
 
         email = data.get("email")
@@ -132,10 +118,12 @@ def api_login():
                 400,
             )
 
-        logger.debug(f"API Login attempt for email: {email}")
+        logger.debug("API Login attempt for email: %s", email)
 
         user = User.query.filter_by(email=email).first()
         if user and user.check_password(password):
+            if user.upgrade_password_hash(password):
+                db.session.commit()
             login_user(user)
             return (
                 jsonify(
@@ -154,8 +142,10 @@ def api_login():
                 401,
             )
 
+    except PasswordHashingBusy:
+        raise
     except Exception as e:
-        logger.error(f"API Login error: {str(e)}")
+        logger.error("API Login error: %s", e)
         return (
             jsonify({"success": False, "message": "An error occurred during login"}),
             500,
@@ -171,7 +161,7 @@ def api_logout():
         logout_user()
         return jsonify({"success": True, "message": "Logged out successfully"}), 200
     except Exception as e:
-        logger.error(f"API Logout error: {str(e)}")
+        logger.error("API Logout error: %s", e)
         return (
             jsonify({"success": False, "message": "An error occurred during logout"}),
             500,
@@ -180,11 +170,12 @@ def api_logout():
 
 @auth_bp.route("/api/register", methods=["POST"])
 @csrf.exempt
+@admission.guard
 def api_register():
     """API endpoint for user registration"""
     try:
         data = request.get_json()
-        if not data:
+        if not isinstance(data, dict) or not data:
             return jsonify({"success": False, "message": "No data provided"}), 400
 
         # Extract and validate required fields
@@ -201,55 +192,7 @@ def api_register():
                 400,
             )
 
-        if role not in ["parent", "child"]:
-            return jsonify({"success": False, "message": "Invalid role"}), 400
-
-        # Check if username or email already exists
-        if User.query.filter_by(username=username).first():
-            return (
-                jsonify({"success": False, "message": "Username already exists"}),
-                409,
-            )
-
-        if User.query.filter_by(email=email).first():
-            return (
-                jsonify({"success": False, "message": "Email already registered"}),
-                409,
-            )
-
-        # Handle child registration - parent code validation
-        parent = None
-        if role == "child":
-            if not parent_code:
-                return (
-                    jsonify(
-                        {
-                            "success": False,
-                            "message": "Parent code is required for child registration",
-                        }
-                    ),
-                    400,
-                )
-
-            parent = User.query.filter_by(
-                parent_code=parent_code, role="parent"
-            ).first()
-            if not parent:
-                return (
-                    jsonify({"success": False, "message": "Invalid parent code"}),
-                    400,
-                )
-
-        # Create new user
-        user = User(username=username, email=email, role=role)
-        user.set_password(password)
-
-        # Link child to parent if applicable
-        if role == "child" and parent:
-            user.parent_id = parent.id
-
-        db.session.add(user)
-        db.session.commit()
+        user = register_user(username, email, password, role, parent_code)
 
         return (
             jsonify(
@@ -262,9 +205,13 @@ def api_register():
             201,
         )
 
+    except RegistrationError as e:
+        return jsonify({"success": False, "message": e.message}), e.status_code
+    except PasswordHashingBusy:
+        raise
     except Exception as e:
         db.session.rollback()
-        logger.error(f"API Registration error: {str(e)}")
+        logger.error("API Registration error: %s", e)
         return (
             jsonify(
                 {"success": False, "message": "An error occurred during registration"}
@@ -275,27 +222,30 @@ def api_register():
 
 @auth_bp.route("/api/me", methods=["GET"])
 @login_required
+@family_etag
 def api_current_user():
     """API endpoint to get current user info"""
     try:
-        return jsonify({"success": True, "user": current_user.to_dict()}), 200
+        return jsonify({"success": True, "user": serialize_user(current_user)}), 200
     except Exception as e:
-        logger.error(f"API Current user error: {str(e)}")
+        logger.error("API Current user error: %s", e)
         return jsonify({"success": False, "message": "An error occurred"}), 500
 
 
 @auth_bp.route("/api/parent-code/<parent_code>", methods=["GET"])
+@use_primary  # codes are checked right after another user (re)generates one
 def api_validate_parent_code(parent_code):
     """API endpoint to validate parent code"""
     try:
-        parent = User.query.filter_by(parent_code=parent_code, role="parent").first()
+        parent = parent_code_lookup.find(parent_code)
         if parent:
+            parent_id, username = parent
             return (
                 jsonify(
                     {
                         "success": True,
                         "valid": True,
-                        "parent": {"username": parent.username, "id": parent.id},
+                        "parent": {"username": username, "id": parent_id},
                     }
                 ),
                 200,
@@ -308,5 +258,5 @@ def api_validate_parent_code(parent_code):
                 200,
             )
     except Exception as e:
-        logger.error(f"API Parent code validation error: {str(e)}")
+        logger.error("API Parent code validation error: %s", e)
         return jsonify({"success": False, "message": "An error occurred"}), 500
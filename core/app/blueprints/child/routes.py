@@ -1,8 +1,9 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
-from core.app.models.user import User
+from core.app.models.user import User, BASIC_SERIALIZER, serialize_user
 from core.app.extensions import db
 from core.app.utils.decorators import child_required
+from core.app.utils.conditional import family_etag
 import logging
 
 logger = logging.getLogger(__name__)
@@ -46,20 +47,19 @@ def profile():
 @child.route("/api/dashboard", methods=["GET"])
 @login_required
 @child_required
+@family_etag
 def api_dashboard():
     """API endpoint for child dashboard data"""
     try:
-        parent = (
-            User.query.get(current_user.parent_id) if current_user.parent_id else None
-        )
+        parent = current_user.parent
         return (
             jsonify(
                 {
                     "success": True,
                     "data": {
-                        "child": current_user.to_dict_basic(),
-                        "parent": parent.to_dict_basic() if parent else None,
-                        "points_balance": 0,  # TODO: Implement points system
+                        "child": BASIC_SERIALIZER(current_user),
+                        "parent": BASIC_SERIALIZER(parent),
+                        "points_balance": current_user.points,
                         "completed_tasks": 0,  # TODO: Implement tasks system
                         "available_rewards": [],  # TODO: Implement rewards system
                     },
@@ -68,7 +68,7 @@ def api_dashboard():
             200,
         )
     except Exception as e:
-        logger.error(f"Child dashboard error: {str(e)}")
+        logger.error("Child dashboard error: %s", e)
         return jsonify({"success": False, "message": "An error occurred"}), 500
 
 
@@ -78,16 +78,10 @@ def api_dashboard():
 def api_get_profile():
     """API endpoint to get child profile"""
     try:
-        parent = (
-            User.query.get(current_user.parent_id) if current_user.parent_id else None
-        )
-        profile_data = current_user.to_dict()
-        if parent:
-            profile_data["parent"] = parent.to_dict_basic()
-
-        return jsonify({"success": True, "profile": profile_data}), 200
+        # to_dict() already includes the parent, loaded once via current_user
+        return jsonify({"success": True, "profile": serialize_user(current_user)}), 200
     except Exception as e:
-        logger.error(f"Get profile error: {str(e)}")
+        logger.error("Get profile error: %s", e)
         return jsonify({"success": False, "message": "An error occurred"}), 500
 
 
@@ -130,14 +124,14 @@ def api_update_profile():
                 {
                     "success": True,
                     "message": "Profile updated successfully",
-                    "profile": current_user.to_dict(),
+                    "profile": serialize_user(current_user),
                 }
             ),
             200,
         )
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Update profile error: {str(e)}")
+        logger.error("Update profile error: %s", e)
         return jsonify({"success": False, "message": "An error occurred"}), 500
 
 
@@ -150,11 +144,11 @@ def api_get_parent():
         if not current_user.parent_id:
             return jsonify({"success": False, "message": "No parent associated"}), 404
 
-        parent = User.query.get(current_user.parent_id)
+        parent = current_user.parent
         if not parent:
             return jsonify({"success": False, "message": "Parent not found"}), 404
 
-        return jsonify({"success": True, "parent": parent.to_dict_basic()}), 200
+        return jsonify({"success": True, "parent": BASIC_SERIALIZER(parent)}), 200
     except Exception as e:
-        logger.error(f"Get parent error: {str(e)}")
+        logger.error("Get parent error: %s", e)
         return jsonify({"success": False, "message": "An error occurred"}), 500
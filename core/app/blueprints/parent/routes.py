@@ -1,8 +1,27 @@
-from flask import jsonify, request, Blueprint, render_template, redirect, url_for, flash
+from flask import (
+    jsonify,
+    request,
+    Blueprint,
+    render_template,
+    redirect,
+    url_for,
+    flash,
+    current_app,
+)
 from flask_login import login_required, current_user
-from core.app.models.user import User
+from core.app.models.user import (
+    User,
+    BASIC_SERIALIZER,
+    serialize_user,
+    serialize_users,
+)
+from core.app.models.points import PointsTransaction
+from core.app.models.parent_code import commit_with_parent_code_retry
+from core.app.models.family_version import family_version
 from core.app.extensions import db
 from core.app.utils.decorators import parent_required
+from core.app.utils.idempotency import idempotent
+from core.app.utils.conditional import family_etag
 import logging
 import os
 
@@ -33,7 +52,12 @@ def root():
 @login_required
 @parent_required
 def dashboard():
-    return render_template("parent/dashboard.html", body_class="dashboard-page")
+    # Children are loaded by the template only when its cached fragments miss
+    return render_template(
+        "parent/dashboard.html",
+        family_version=family_version(current_user),
+        body_class="dashboard-page",
+    )
 
 
 @parent.route("/add_child", methods=["GET", "POST"])
@@ -104,7 +128,14 @@ def view_child(child_id):
         flash("Unauthorized action", "error")
         return redirect(url_for("parent.dashboard"))
 
-    return render_template("parent/view_child.html", child=child)
+    page_size = current_app.config["POINTS_HISTORY_PAGE_SIZE"]
+    return render_template(
+        "parent/view_child.html",
+        child=child,
+        family_version=family_version(child),
+        # Only called when the cached history fragment misses
+        load_history=lambda: PointsTransaction.history_page(child.id, page_size),
+    )
 
 
 @parent.route("/children", methods=["GET"])
@@ -113,7 +144,7 @@ def view_child(child_id):
 def get_children():
     """Get all children associated with the current parent"""
     try:
-        children = [child.to_dict_basic() for child in current_user.children]
+        children = BASIC_SERIALIZER.many(current_user.children)
         return jsonify(
             {
                 "success": True,
@@ -121,7 +152,7 @@ def get_children():
             }
         )
     except Exception as e:
-        logger.error(f"Error fetching children: {str(e)}")
+        logger.error("Error fetching children: %s", e)
         return jsonify({"success": False, "error": "Failed to fetch children"}), 500
 
 
@@ -137,9 +168,8 @@ def get_parent_code():
 @login_required
 @parent_required
 def generate_new_parent_code():
-    print("CSRF Token in Request:", request.form.get("csrf_token"))  # Debugging log
     current_user.generate_parent_code()
-    db.session.commit()
+    commit_with_parent_code_retry(current_user)
     flash("Parent code generated successfully!", "success")
     return redirect(url_for("parent.dashboard"))
 
@@ -166,7 +196,7 @@ def remove_child_api(child_id):
         db.session.commit()
         return jsonify({"success": True, "message": "Child removed successfully"})
     except Exception as e:
-        logger.error(f"Error removing child: {str(e)}")
+        logger.error("Error removing child: %s", e)
         db.session.rollback()
         return jsonify({"success": False, "error": "Failed to remove child"}), 500
 
@@ -176,7 +206,7 @@ def remove_child_api(child_id):
 @parent_required
 def get_child_details(child_id):
     """Get detailed information about a specific child"""
-    child = User.query.get(child_id)
+    child = db.session.get(User, child_id)
     if not child or child.parent_id != current_user.id:
         return (
             jsonify(
@@ -188,15 +218,16 @@ def get_child_details(child_id):
             404,
         )
 
-    return jsonify({"success": True, "data": child.to_dict()})
+    return jsonify({"success": True, "data": serialize_user(child)})
 
 
 @parent.route("/children/<int:child_id>/points", methods=["POST"])
 @login_required
 @parent_required
+@idempotent
 def update_child_points(child_id):
     """Update points for a child"""
-    child = User.query.get(child_id)
+    child = db.session.get(User, child_id)
     if not child or child.parent_id != current_user.id:
         return (
             jsonify(
@@ -208,7 +239,9 @@ def update_child_points(child_id):
             404,
         )
 
-    data = request.get_json()
+    data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "error": "No data provided"}), 400
     points = data.get("points")
     reason = data.get("reason")
 
@@ -216,9 +249,8 @@ def update_child_points(child_id):
         return jsonify({"success": False, "error": "Points value is required"}), 400
 
     try:
-        # Assuming you have a points system implemented
-        child.update_points(points, reason)
-        db.session.commit()
+        child.update_points(points, reason, awarded_by=current_user)
+        db.session.flush()  # committed by @idempotent
         return jsonify(
             {
                 "success": True,
@@ -226,11 +258,144 @@ def update_child_points(child_id):
                 "data": {"current_points": child.points},
             }
         )
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        logger.error("Error updating points: %s", e)
+        db.session.rollback()
+        return jsonify({"success": False, "error": "Failed to update points"}), 500
+
+
+@parent.route("/children/<int:child_id>/points", methods=["GET"])
+@login_required
+@parent_required
+def get_child_points_history(child_id):
+    """Get one page of a child's points history, newest first
+
+    Pass the returned ``next_cursor`` back as ``cursor`` to fetch the next page.
+    """
+    child = db.session.get(User, child_id)
+    if not child or child.parent_id != current_user.id:
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": "Child not found or not associated with this parent",
+                }
+            ),
+            404,
+        )
+
+    limit = request.args.get(
+        "limit", current_app.config["POINTS_HISTORY_PAGE_SIZE"], type=int
+    )
+    limit = max(1, min(limit, current_app.config["POINTS_HISTORY_MAX_PAGE_SIZE"]))
+
+    try:
+        entries, next_cursor = PointsTransaction.history_page(
+            child.id, limit, request.args.get("cursor")
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    return jsonify(
+        {
+            "success": True,
+            "data": {
+                "entries": [entry.to_dict() for entry in entries],
+                "next_cursor": next_cursor,
+            },
+        }
+    )
+
+
+@parent.route("/children/points", methods=["POST"])
+@login_required
+@parent_required
+@idempotent
+def bulk_update_child_points():
+    """Apply the same points change to several children in one transaction
+
+    Accepts ``child_ids`` (a list) or ``"all": true`` for every child of the
+    current parent, plus ``points`` and an optional ``reason``.
+    """
+    data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "error": "No data provided"}), 400
+    points = data.get("points")
+    reason = data.get("reason")
+
+    if points is None:
+        return jsonify({"success": False, "error": "Points value is required"}), 400
+
+    owned = db.session.query(User.id).filter(User.parent_id == current_user.id)
+    if data.get("all"):
+        requested_ids = None
+    else:
+        requested_ids = data.get("child_ids")
+        if not isinstance(requested_ids, list) or not requested_ids:
+            return (
+                jsonify(
+                    {"success": False, "error": "child_ids or all=true is required"}
+                ),
+                400,
+            )
+        if not all(
+            isinstance(i, int) and not isinstance(i, bool) for i in requested_ids
+        ):
+            return (
+                jsonify({"success": False, "error": "child_ids must be integers"}),
+                400,
+            )
+        # Preserve request order while dropping duplicates
+        requested_ids = list(dict.fromkeys(requested_ids))
+        owned = owned.filter(User.id.in_(requested_ids))
+
+    owned_ids = [row.id for row in owned]
+    if requested_ids is None:
+        requested_ids = owned_ids
+
+    try:
+        balances = User.bulk_update_points(
+            owned_ids, points, reason, awarded_by=current_user
+        )
+        db.session.flush()  # committed by @idempotent
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
-        logger.error(f"Error updating points: {str(e)}")
+        logger.error("Error bulk updating points: %s", e)
         db.session.rollback()
         return jsonify({"success": False, "error": "Failed to update points"}), 500
 
+    results = []
+    for child_id in requested_ids:
+        if child_id in balances:
+            results.append(
+                {
+                    "child_id": child_id,
+                    "success": True,
+                    "current_points": balances[child_id],
+                }
+            )
+        else:
+            results.append(
+                {
+                    "child_id": child_id,
+                    "success": False,
+                    "error": "Child not found or not associated with this parent",
+                }
+            )
+
+    return jsonify(
+        {
+            "success": True,
+            "message": f"Points updated for {len(balances)} children",
+            "data": {"results": results},
+        }
+    )
+
 
 # =============================================================================
 # API ROUTES - Additional JSON endpoints for React frontend
@@ -240,6 +405,7 @@ def update_child_points(child_id):
 @parent.route("/api/dashboard", methods=["GET"])
 @login_required
 @parent_required
+@family_etag
 def api_dashboard():
     """API endpoint for parent dashboard data"""
     try:
@@ -249,8 +415,8 @@ def api_dashboard():
                 {
                     "success": True,
                     "data": {
-                        "parent": current_user.to_dict_basic(),
-                        "children": [child.to_dict_basic() for child in children],
+                        "parent": BASIC_SERIALIZER(current_user),
+                        "children": BASIC_SERIALIZER.many(children),
                         "parent_code": current_user.parent_code,
                     },
                 }
@@ -258,7 +424,7 @@ def api_dashboard():
             200,
         )
     except Exception as e:
-        logger.error(f"Parent dashboard error: {str(e)}")
+        logger.error("Parent dashboard error: %s", e)
         return jsonify({"success": False, "message": "An error occurred"}), 500
 
 
@@ -268,15 +434,14 @@ def api_dashboard():
 def api_get_children():
     """API endpoint to get all children for current parent"""
     try:
+        # Each child's parent is current_user, already in the identity map
         children = User.query.filter_by(parent_id=current_user.id).all()
         return (
-            jsonify(
-                {"success": True, "children": [child.to_dict() for child in children]}
-            ),
+            jsonify({"success": True, "children": serialize_users(children)}),
             200,
         )
     except Exception as e:
-        logger.error(f"Get children error: {str(e)}")
+        logger.error("Get children error: %s", e)
         return jsonify({"success": False, "message": "An error occurred"}), 500
 
 
@@ -286,15 +451,15 @@ def api_get_children():
 def api_get_child(child_id):
     """API endpoint to get specific child details"""
     try:
-        child = User.query.get_or_404(child_id)
+        child = db.get_or_404(User, child_id)
 
         # Verify that the child belongs to the current parent
         if child.parent_id != current_user.id:
             return jsonify({"success": False, "message": "Unauthorized"}), 403
 
-        return jsonify({"success": True, "child": child.to_dict()}), 200
+        return jsonify({"success": True, "child": serialize_user(child)}), 200
     except Exception as e:
-        logger.error(f"Get child error: {str(e)}")
+        logger.error("Get child error: %s", e)
         return jsonify({"success": False, "message": "An error occurred"}), 500
 
 
@@ -319,7 +484,7 @@ def api_remove_child(child_id):
         )
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Remove child error: {str(e)}")
+        logger.error("Remove child error: %s", e)
         return jsonify({"success": False, "message": "An error occurred"}), 500
 
 
@@ -329,9 +494,9 @@ def api_remove_child(child_id):
 def api_get_profile():
     """API endpoint to get parent profile"""
     try:
-        return jsonify({"success": True, "profile": current_user.to_dict()}), 200
+        return jsonify({"success": True, "profile": serialize_user(current_user)}), 200
     except Exception as e:
-        logger.error(f"Get profile error: {str(e)}")
+        logger.error("Get profile error: %s", e)
         return jsonify({"success": False, "message": "An error occurred"}), 500
 
 
@@ -373,12 +538,12 @@ def api_update_profile():
                 {
                     "success": True,
                     "message": "Profile updated successfully",
-                    "profile": current_user.to_dict(),
+                    "profile": serialize_user(current_user),
                 }
             ),
             200,
         )
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Update profile error: {str(e)}")
+        logger.error("Update profile error: %s", e)
         return jsonify({"success": False, "message": "An error occurred"}), 500
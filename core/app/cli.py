@@ -0,0 +1,22 @@
+from flask.cli import AppGroup
+from werkzeug.utils import import_string
+
+
+class LazyAppGroup(AppGroup):
+    """App command group whose subcommands are imported on first use.
+
+    ``lazy_commands`` maps command names to import strings, so building the
+    app for a web worker never imports the maintenance commands.
+    """
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, name):
+        if name not in self.commands and name in self.lazy_commands:
+            self.add_command(import_string(self.lazy_commands[name]), name)
+        return super().get_command(ctx, name)
@@ -0,0 +1,708 @@
+import http.client
+import json
+import math
+import multiprocessing
+import os
+import random
+import re
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from http.cookies import SimpleCookie
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from core.app.assets import build_assets
+from core.app.database import set_sqlite_pragmas
+from core.app.extensions import db, password_hasher
+from core.app.hashing import hash_password, verify_password
+from core.app.family_import import import_families, read_rows
+from core.app.family_export import EXPORTS, render_export
+from core.app.metrics import percentile
+from core.app.models.user import User, serialize_user, serialize_users
+from core.app.models.points import (
+    PointsCheckpoint,
+    PointsTransaction,
+    compute_balance,
+)
+from core.app.models.family_version import bump_family_versions
+
+points_cli = AppGroup("points", help="Points ledger maintenance commands.")
+passwords_cli = AppGroup("passwords", help="Password hashing commands.")
+families_cli = AppGroup("families", help="Bulk family import and export commands.")
+json_cli = AppGroup("json", help="JSON serialization commands.")
+assets_cli = AppGroup("assets", help="Static asset build commands.")
+database_cli = AppGroup("database", help="Database engine commands.")
+startup_cli = AppGroup("startup", help="Application startup commands.")
+server_cli = AppGroup("server", help="WSGI server commands.")
+
+
+@points_cli.command("checkpoint")
+@click.option(
+    "--min-entries",
+    default=100,
+    show_default=True,
+    help="Only checkpoint children with at least this many new ledger entries.",
+)
+@click.option(
+    "--settle-seconds",
+    default=300,
+    show_default=True,
+    help="Ignore ledger entries newer than this many seconds.",
+)
+def checkpoint(min_entries, settle_seconds):
+    """Write balance checkpoints for children with recent ledger activity."""
+    written = PointsCheckpoint.write_checkpoints(min_entries, settle_seconds)
+    db.session.commit()
+    click.echo(f"Wrote {written} checkpoint(s)")
+
+
+@points_cli.command("verify")
+@click.option("--fix", is_flag=True, help="Overwrite stored balances that differ.")
+def verify(fix):
+    """Check every child's stored balance against the ledger."""
+    mismatches = 0
+    children = db.session.execute(
+        db.select(User.id, User.username, User.points).where(User.role == "child")
+    )
+    for child_id, username, stored in children.all():
+        expected = compute_balance(child_id)
+        if expected == stored:
+            continue
+        mismatches += 1
+        click.echo(f"{username} (id={child_id}): stored {stored}, ledger {expected}")
+        if fix:
+            db.session.execute(
+                db.update(User).where(User.id == child_id).values(points=expected)
+            )
+            bump_family_versions(db.session, [child_id])
+
+    if fix and mismatches:
+        db.session.commit()
+    click.echo(f"{mismatches} mismatched balance(s)")
+
+
+DEFAULT_BENCHMARK_SETTINGS = (
+    "bcrypt:10",
+    "bcrypt:11",
+    "bcrypt:12",
+    "bcrypt:13",
+    "scrypt:32768:8:1",
+    "pbkdf2:sha256:600000",
+)
+
+
+@passwords_cli.command("benchmark")
+@click.option(
+    "--setting",
+    "settings",
+    multiple=True,
+    help="Policy to measure, e.g. bcrypt:12 or scrypt:32768:8:1. Repeatable.",
+)
+@click.option(
+    "--seconds",
+    default=2.0,
+    show_default=True,
+    help="Minimum time to spend on each setting.",
+)
+def benchmark(settings, seconds):
+    """Report single-core hashes/second for each password hashing setting.
+
+    Multiply by PASSWORD_HASH_WORKERS for the pool's approximate capacity.
+    """
+    workers = current_app.config["PASSWORD_HASH_WORKERS"] or 1
+    click.echo(f"Current policy: {password_hasher.policy} ({workers} worker(s))")
+    click.echo(f"{'setting':<24}{'ms/hash':>10}{'hashes/s':>12}{'pool/s':>10}")
+    for setting in settings or DEFAULT_BENCHMARK_SETTINGS:
+        count = 0
+        start = time.perf_counter()
+        while True:
+            pwhash = hash_password(setting, "benchmark-password")
+            count += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= seconds:
+                break
+        assert verify_password(pwhash, "benchmark-password")
+        per_second = count / elapsed
+        click.echo(
+            f"{setting:<24}{elapsed / count * 1000:>10.1f}"
+            f"{per_second:>12.1f}{per_second * workers:>10.1f}"
+        )
+
+
+@families_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["csv", "jsonl"]),
+    help="Input format; defaults to the file extension.",
+)
+@click.option(
+    "--batch-size",
+    type=int,
+    help="Rows per transaction; defaults to IMPORT_BATCH_SIZE.",
+)
+def import_command(path, fmt, batch_size):
+    """Create parent and child accounts from a CSV or JSONL file.
+
+    Parents must appear before children that reference their parent_code.
+    """
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    batch_size = batch_size or current_app.config["IMPORT_BATCH_SIZE"]
+
+    def report(result):
+        click.echo(
+            f"{result.processed} processed, {result.created} created, "
+            f"{result.failed} failed"
+        )
+
+    with open(path, "rb") as stream:
+        result = import_families(read_rows(stream, fmt), batch_size, report)
+
+    for error in result.errors:
+        click.echo(f"line {error['line']}: {error['error']}", err=True)
+    if result.failed > len(result.errors):
+        click.echo(f"... {result.failed - len(result.errors)} more error(s)", err=True)
+
+
+@families_cli.command("export")
+@click.argument("kind", type=click.Choice(sorted(EXPORTS)))
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["ndjson", "csv"]),
+    default="ndjson",
+    show_default=True,
+)
+@click.option("--after-id", type=int, help="Resume after this id.")
+@click.option(
+    "--output",
+    type=click.File("w", lazy=True),
+    default="-",
+    help="File to write; defaults to stdout.",
+)
+def export_command(kind, fmt, after_id, output):
+    """Stream all users or points ledger rows in id order."""
+    for chunk in render_export(
+        kind, fmt, after_id, current_app.config["EXPORT_CHUNK_SIZE"]
+    ):
+        output.write(chunk)
+
+
+def _benchmark_family(children):
+    """An unsaved parent with the given number of children"""
+    now = datetime.utcnow()
+    parent = User(
+        id=1,
+        username="benchmark-parent",
+        email="parent@benchmark.invalid",
+        role="parent",
+        parent_code="BENCHMRK",
+        created_at=now,
+    )
+    parent.children = [
+        User(
+            id=index + 2,
+            username=f"benchmark-child-{index}",
+            email=f"child-{index}@benchmark.invalid",
+            role="child",
+            points=index,
+            created_at=now,
+        )
+        for index in range(children)
+    ]
+    return parent
+
+
+@json_cli.command("benchmark")
+@click.option(
+    "--children",
+    default=1000,
+    show_default=True,
+    help="Number of children in the serialized family.",
+)
+@click.option(
+    "--seconds",
+    default=2.0,
+    show_default=True,
+    help="Minimum time to spend on each payload and encoder.",
+)
+def json_benchmark(children, seconds):
+    """Compare to_dict() + stdlib encoding with the precompiled serializers.
+
+    Encodes a parent profile (the parent with all children) and a children
+    list (every child with its parent) using the compact response settings.
+    """
+    parent = _benchmark_family(children)
+    stdlib = DefaultJSONProvider(current_app._get_current_object())
+    payloads = {
+        "parent profile": (
+            lambda: {"success": True, "profile": parent.to_dict()},
+            lambda: {"success": True, "profile": serialize_user(parent)},
+        ),
+        "children list": (
+            lambda: {
+                "success": True,
+                "children": [child.to_dict() for child in parent.children],
+            },
+            lambda: {"success": True, "children": serialize_users(parent.children)},
+        ),
+    }
+
+    def measure(provider, build):
+        count = 0
+        start = time.perf_counter()
+        while True:
+            provider.dumps(build(), separators=(",", ":"))
+            count += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= seconds:
+                return elapsed / count * 1000
+
+    click.echo(f"{'payload':<18}{'to_dict ms':>12}{'serializer ms':>15}{'speedup':>9}")
+    for name, (baseline, precompiled) in payloads.items():
+        expected = stdlib.dumps(baseline(), separators=(",", ":"))
+        actual = current_app.json.dumps(precompiled(), separators=(",", ":"))
+        assert expected == actual, f"{name}: serializer output differs"
+        before = measure(stdlib, baseline)
+        after = measure(current_app.json, precompiled)
+        click.echo(f"{name:<18}{before:>12.2f}{after:>15.2f}{before / after:>8.1f}x")
+
+
+@assets_cli.command("build")
+def build_assets_command():
+    """Minify, fingerprint and gzip the static stylesheets and scripts.
+
+    Run as part of each deploy; the app serves the build when
+    STATIC_ASSETS_ENABLED is set and falls back to the source files otherwise.
+    """
+    click.echo(f"{'asset':<40}{'raw':>10}{'minified':>10}{'gzip':>10}")
+    for source, built, raw, minified, compressed in build_assets(
+        current_app.static_folder
+    ):
+        click.echo(f"{built:<40}{raw:>10}{minified:>10}{compressed:>10}")
+
+
+def _seed_benchmark_database(uri, children):
+    engine = create_engine(uri)
+    db.metadata.create_all(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(
+            db.insert(User),
+            [
+                {
+                    "id": index + 1,
+                    "username": f"benchmark-{index}",
+                    "email": f"benchmark-{index}@benchmark.invalid",
+                    "password_hash": "-",
+                    "role": "child",
+                    "points": 0,
+                    "created_at": now,
+                }
+                for index in range(children)
+            ],
+        )
+    engine.dispose()
+
+
+def _database_benchmark_worker(uri, pragmas, seconds, write_ratio, children, seed):
+    """One simulated app worker: mixed balance reads and points awards.
+
+    Returns (operations, lock errors, sorted latencies in ms).
+    """
+    engine = create_engine(uri)
+    set_sqlite_pragmas(engine, pragmas)
+    rng = random.Random(seed)
+    operations = errors = 0
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        child_id = rng.randint(1, children)
+        start = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                if rng.random() < write_ratio:
+                    conn.execute(
+                        db.insert(PointsTransaction).values(
+                            child_id=child_id,
+                            points=1,
+                            reason="benchmark",
+                            timestamp=datetime.utcnow(),
+                        )
+                    )
+                    conn.execute(
+                        db.update(User)
+                        .where(User.id == child_id)
+                        .values(points=User.points + 1)
+                    )
+                else:
+                    conn.execute(db.select(User.points).where(User.id == child_id))
+                    conn.execute(
+                        db.select(PointsTransaction)
+                        .where(PointsTransaction.child_id == child_id)
+                        .order_by(PointsTransaction.timestamp.desc())
+                        .limit(20)
+                    ).all()
+        except OperationalError:
+            errors += 1
+        else:
+            operations += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+    engine.dispose()
+    return operations, errors, sorted(latencies)
+
+
+@database_cli.command("benchmark")
+@click.option("--workers", default=4, show_default=True, help="Worker processes.")
+@click.option(
+    "--seconds",
+    default=5.0,
+    show_default=True,
+    help="How long each profile runs.",
+)
+@click.option(
+    "--write-ratio",
+    default=0.2,
+    show_default=True,
+    help="Fraction of operations that award points.",
+)
+@click.option("--children", default=100, show_default=True)
+def database_benchmark(workers, seconds, write_ratio, children):
+    """Compare mixed read/write throughput on SQLite with and without the
+    configured pragmas.
+
+    Each profile runs against its own scratch database file with the app's
+    schema; the configured database is not touched.
+    """
+    profiles = {
+        "default": {},
+        "configured": current_app.config["SQLITE_PRAGMAS"],
+    }
+    click.echo(
+        f"{'profile':<12}{'ops/s':>10}{'lock errors':>13}{'p50 ms':>9}{'p99 ms':>9}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for name, pragmas in profiles.items():
+            uri = "sqlite:///" + os.path.join(directory, f"{name}.db")
+            _seed_benchmark_database(uri, children)
+            with multiprocessing.Pool(workers) as pool:
+                results = pool.starmap(
+                    _database_benchmark_worker,
+                    [
+                        (uri, pragmas, seconds, write_ratio, children, seed)
+                        for seed in range(workers)
+                    ],
+                )
+            operations = sum(result[0] for result in results)
+            errors = sum(result[1] for result in results)
+            latencies = sorted(ms for result in results for ms in result[2])
+
+            p50, p99 = (percentile(latencies, q, math.nan) for q in (0.5, 0.99))
+            click.echo(
+                f"{name:<12}{operations / seconds:>10.0f}{errors:>13}"
+                f"{p50:>9.2f}{p99:>9.2f}"
+            )
+
+
+# Run in a fresh interpreter so nothing is already imported or cached
+STARTUP_PROBE = """
+import sys, time
+start = time.perf_counter()
+from core.app import create_app
+imported = time.perf_counter()
+create_app(sys.argv[1])
+created = time.perf_counter()
+print(imported - start, created - imported, len(sys.modules))
+"""
+
+
+@startup_cli.command("benchmark")
+@click.option(
+    "--runs", default=5, show_default=True, help="Fresh interpreters to time."
+)
+@click.option(
+    "--config",
+    "config_name",
+    default="production",
+    show_default=True,
+    help="Config passed to create_app().",
+)
+def startup_benchmark(runs, config_name):
+    """Time importing the app package and create_app() in fresh interpreters.
+
+    This is roughly what every recycled gunicorn worker pays without
+    --preload (interpreter startup itself is excluded).
+    """
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    # Time building the app, not the schema check against whatever database
+    # the environment points at
+    env = dict(os.environ, PYTHONPATH=root, DATABASE_STARTUP="skip")
+    imports, creates = [], []
+    for _ in range(runs):
+        probe = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE, config_name],
+            cwd=root,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if probe.returncode:
+            click.echo(probe.stderr, err=True)
+            raise click.ClickException("create_app() failed in the probe")
+        output = probe.stdout.split()
+        imports.append(float(output[-3]) * 1000)
+        creates.append(float(output[-2]) * 1000)
+        modules = int(output[-1])
+
+    click.echo(f"{'phase':<14}{'median ms':>11}{'min ms':>9}{'max ms':>9}")
+    for name, times in (("import", imports), ("create_app", creates)):
+        click.echo(
+            f"{name:<14}{statistics.median(times):>11.1f}"
+            f"{min(times):>9.1f}{max(times):>9.1f}"
+        )
+    click.echo(f"{modules} modules loaded")
+
+
+SERVER_BENCHMARK_PASSWORD = "benchmark-password"
+# Read side of the endpoint mix, picked uniformly
+SERVER_BENCHMARK_READS = ("/auth/api/me", "/parent/api/dashboard", "/parent/dashboard")
+CSRF_META = re.compile(r'<meta name="csrf-token" content="([^"]+)"')
+
+
+def _seed_server_benchmark_database(uri, families, children):
+    """One parent with ``children`` children per client; returns
+    (parent email, child ids) per family."""
+    engine = create_engine(uri)
+    db.metadata.create_all(engine)
+    pwhash = hash_password(password_hasher.policy, SERVER_BENCHMARK_PASSWORD)
+    now = datetime.utcnow()
+    rows, seeded = [], []
+    next_id = 1
+    for family in range(families):
+        parent_id = next_id
+        email = f"benchmark-parent-{family}@benchmark.invalid"
+        rows.append(
+            {
+                "id": parent_id,
+                "username": f"benchmark-parent-{family}",
+                "email": email,
+                "password_hash": pwhash,
+                "role": "parent",
+                "parent_id": None,
+                "points": 0,
+                "created_at": now,
+            }
+        )
+        child_ids = list(range(parent_id + 1, parent_id + 1 + children))
+        rows.extend(
+            {
+                "id": child_id,
+                "username": f"benchmark-child-{child_id}",
+                "email": f"benchmark-child-{child_id}@benchmark.invalid",
+                "password_hash": "-",
+                "role": "child",
+                "parent_id": parent_id,
+                "points": 0,
+                "created_at": now,
+            }
+            for child_id in child_ids
+        )
+        seeded.append((email, child_ids))
+        next_id += children + 1
+    with engine.begin() as conn:
+        conn.execute(db.insert(User), rows)
+    engine.dispose()
+    return seeded
+
+
+def _server_benchmark_client(port, email, child_ids, seconds, write_ratio, seed):
+    """One simulated browser session: log in, then mix dashboard reads with
+    points awards over a keep-alive connection.
+
+    Returns (requests, errors, sorted latencies in ms).
+    """
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    cookies = SimpleCookie()
+
+    def call(method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if cookies:
+            headers["Cookie"] = "; ".join(f"{k}={v.value}" for k, v in cookies.items())
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        for attempt in range(3):
+            try:
+                conn.request(method, path, body, headers)
+                response = conn.getresponse()
+                data = response.read()
+                break
+            except ConnectionError:
+                # Keep-alive connection dropped by a recycled worker; retry on
+                # a new one like a browser would
+                conn.close()
+                if attempt == 2:
+                    raise
+        for header in response.headers.get_all("Set-Cookie") or ():
+            cookies.load(header)
+        return response, data
+
+    while True:
+        response, _ = call(
+            "POST",
+            "/auth/api/login",
+            {"email": email, "password": SERVER_BENCHMARK_PASSWORD},
+        )
+        # Concurrent logins are shed while password hashing is saturated
+        if response.status not in (429, 503):
+            break
+        time.sleep(int(response.headers.get("Retry-After") or 1))
+    if response.status != 200:
+        raise click.ClickException(
+            f"Benchmark login failed with status {response.status}"
+        )
+    token = CSRF_META.search(call("GET", "/parent/dashboard")[1].decode()).group(1)
+
+    requests = errors = 0
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        if rng.random() < write_ratio:
+            response, _ = call(
+                "POST",
+                f"/parent/children/{rng.choice(child_ids)}/points",
+                {"points": 1, "reason": "benchmark"},
+                {"X-CSRFToken": token},
+            )
+        else:
+            response, _ = call("GET", rng.choice(SERVER_BENCHMARK_READS))
+        if response.status >= 400:
+            errors += 1
+        else:
+            requests += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+    conn.close()
+    return requests, errors, sorted(latencies)
+
+
+def _wait_for_port(port, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise click.ClickException("gunicorn exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise click.ClickException("gunicorn did not start listening in time")
+
+
+@server_cli.command("benchmark")
+@click.option(
+    "--profile",
+    "profiles",
+    multiple=True,
+    help="WORKERSxTHREADS to measure, e.g. 2x4; 'auto' uses gunicorn.conf.py's "
+    "choice for this host. Repeatable.",
+)
+@click.option("--clients", default=8, show_default=True, help="Client processes.")
+@click.option(
+    "--seconds",
+    default=10.0,
+    show_default=True,
+    help="How long each profile runs.",
+)
+@click.option(
+    "--write-ratio",
+    default=0.1,
+    show_default=True,
+    help="Fraction of requests that award points.",
+)
+@click.option("--children", default=5, show_default=True, help="Per family.")
+def server_benchmark(profiles, clients, seconds, write_ratio, children):
+    """Load-test gunicorn with wsgi:app under several worker/thread settings.
+
+    Each profile starts gunicorn with gunicorn.conf.py and the production
+    config against a scratch SQLite database. Every client logs in as its own
+    parent, then requests the JSON and HTML dashboards and awards points.
+    Clients run on the same host, so they compete with the server for CPU.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    click.echo(
+        f"{'profile':<10}{'req/s':>9}{'errors':>8}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in profiles or ("1x1", "2x1", "1x4", "2x4", "auto"):
+            uri = "sqlite:///" + os.path.join(directory, f"{profile}.db")
+            families = _seed_server_benchmark_database(uri, clients, children)
+            with socket.socket() as probe:
+                probe.bind(("127.0.0.1", 0))
+                port = probe.getsockname()[1]
+
+            env = dict(
+                os.environ,
+                PYTHONPATH=root,
+                FLASK_CONFIG="production",
+                DATABASE_URL=uri,
+                DATABASE_STARTUP="skip",
+            )
+            env.pop("WEB_CONCURRENCY", None)
+            env.pop("GUNICORN_THREADS", None)
+            if profile != "auto":
+                workers, threads = profile.split("x")
+                env.update(WEB_CONCURRENCY=workers, GUNICORN_THREADS=threads)
+            server = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "gunicorn",
+                    "-c",
+                    os.path.join(root, "gunicorn.conf.py"),
+                    "--bind",
+                    f"127.0.0.1:{port}",
+                    "wsgi:app",
+                ],
+                cwd=root,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                _wait_for_port(port, server, timeout=30)
+                with multiprocessing.Pool(clients) as pool:
+                    results = pool.starmap(
+                        _server_benchmark_client,
+                        [
+                            (port, email, child_ids, seconds, write_ratio, seed)
+                            for seed, (email, child_ids) in enumerate(families)
+                        ],
+                    )
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait()
+
+            requests = sum(result[0] for result in results)
+            errors = sum(result[1] for result in results)
+            latencies = sorted(ms for result in results for ms in result[2])
+
+            p50, p95, p99 = (
+                percentile(latencies, q, math.nan) for q in (0.5, 0.95, 0.99)
+            )
+            click.echo(
+                f"{profile:<10}{requests / seconds:>9.0f}{errors:>8}"
+                f"{p50:>9.2f}{p95:>9.2f}{p99:>9.2f}"
+            )
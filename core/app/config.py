@@ -1,6 +1,43 @@
+import multiprocessing
 import os
 from datetime import timedelta
 
+# Applied to every new SQLite connection: WAL lets readers run alongside the
+# single writer, busy_timeout makes writers wait for the lock instead of
+# failing with "database is locked", and synchronous=NORMAL is durable in WAL
+# mode except against power loss.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": 5000,
+    "synchronous": "NORMAL",
+}
+
+# Pool settings for server databases (PostgreSQL, MySQL). pool_recycle stays
+# under typical server/proxy idle timeouts; pre-ping replaces connections the
+# server closed while they sat in the pool.
+SERVER_POOL_OPTIONS = {
+    "pool_size": int(os.environ.get("DATABASE_POOL_SIZE") or 5),
+    "max_overflow": int(os.environ.get("DATABASE_MAX_OVERFLOW") or 10),
+    "pool_timeout": 10,
+    "pool_recycle": 1800,
+    "pool_pre_ping": True,
+}
+
+
+def replica_binds(uri):
+    """SQLALCHEMY_BINDS entry for the optional read replica"""
+    if not uri:
+        return {}
+    return {"replica": dict(engine_options(uri), url=uri)}
+
+
+def engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS profile for a database URI"""
+    if uri.startswith("sqlite"):
+        # SQLite pragmas are set per connection by core.app.database
+        return {}
+    return dict(SERVER_POOL_OPTIONS)
+
 
 class Config:
     # Basic Flask config
@@ -9,26 +46,151 @@ class Config:
     # SQLAlchemy config
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL") or "sqlite:///users.db"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLITE_PRAGMAS = SQLITE_PRAGMAS
+
+    # Optional read replica: read-only requests use it unless a view opts out
+    # with @use_primary, and clients that just wrote stay on the primary for
+    # DATABASE_REPLICA_STICKY_SECONDS (see core.app.database)
+    DATABASE_REPLICA_URI = os.environ.get("DATABASE_REPLICA_URL")
+    SQLALCHEMY_BINDS = replica_binds(DATABASE_REPLICA_URI)
+    DATABASE_REPLICA_STICKY_SECONDS = 5
+
+    # Schema handling at startup: "create" (create_all), "check" (compare the
+    # Alembic stamp with the migration head) or "skip". Run `flask db` with
+    # DATABASE_STARTUP=skip so it works on a missing or outdated schema.
+    DATABASE_STARTUP = os.environ.get("DATABASE_STARTUP") or "create"
+    DATABASE_MIGRATIONS_DIR = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        "migrations",
+    )
 
     # Session config
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
 
-    # Bcrypt config
-    BCRYPT_LOG_ROUNDS = 12
+    # Password hashing policy: "bcrypt" (cost from BCRYPT_LOG_ROUNDS) or a
+    # werkzeug method string such as "scrypt:32768:8:1". Stored hashes made
+    # under an older policy are upgraded on the next successful login.
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD") or "bcrypt"
+    BCRYPT_LOG_ROUNDS = int(os.environ.get("BCRYPT_LOG_ROUNDS") or 12)
+
+    # Web worker processes per host; gunicorn.conf.py uses the same default
+    WEB_CONCURRENCY = int(
+        os.environ.get("WEB_CONCURRENCY") or max(2, (os.cpu_count() or 1) + 1)
+    )
+
+    # Password hashing pool: worker processes, maximum in-flight hash jobs
+    # before requests are rejected with 503, and per-job timeout (seconds).
+    # Every web worker has its own pool, so the host's cores are split
+    # between them rather than each pool getting all of them.
+    PASSWORD_HASH_WORKERS = int(
+        os.environ.get("PASSWORD_HASH_WORKERS")
+        or max(1, (os.cpu_count() or 1) // WEB_CONCURRENCY)
+    )
+    PASSWORD_HASH_MAX_PENDING = int(
+        os.environ.get("PASSWORD_HASH_MAX_PENDING") or PASSWORD_HASH_WORKERS * 4
+    )
+    PASSWORD_HASH_TIMEOUT = 5
+    # multiprocessing start method. forkserver starts pool processes from a
+    # clean single-threaded server: forking a threaded web worker (request
+    # threads, the log listener) can copy a held lock into the child.
+    PASSWORD_HASH_START_METHOD = os.environ.get("PASSWORD_HASH_START_METHOD") or (
+        "forkserver"
+        if "forkserver" in multiprocessing.get_all_start_methods()
+        else None
+    )
+
+    # Admission control for login/registration: token buckets per client IP
+    # and per submitted email, plus a cap on concurrent credential requests
+    AUTH_RATE_LIMIT_ENABLED = True
+    AUTH_RATE_LIMIT_IP_BURST = 20
+    AUTH_RATE_LIMIT_IP_PER_MINUTE = 10
+    AUTH_RATE_LIMIT_EMAIL_BURST = 5
+    AUTH_RATE_LIMIT_EMAIL_PER_MINUTE = 5
+    AUTH_RATE_LIMIT_MAX_KEYS = 100_000
+    AUTH_MAX_CONCURRENT_HASHES = PASSWORD_HASH_MAX_PENDING
+    # Reverse proxies in front of the app; when set, the client address (and
+    # with it the per-IP bucket) comes from that many X-Forwarded-For hops
+    # instead of the proxy's own address. Only count proxies you control.
+    TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS") or 0)
+
+    # Parent codes: counters reserved per database round-trip, and the key
+    # for the code permutation (defaults to one derived from SECRET_KEY)
+    PARENT_CODE_BLOCK_SIZE = 100
+    PARENT_CODE_KEY = os.environ.get("PARENT_CODE_KEY")
+    # In-memory parent code lookup: rebuild interval (seconds) of the Bloom
+    # filter and size of the cache of valid codes
+    PARENT_CODE_FILTER_TTL = 30
+    PARENT_CODE_CACHE_SIZE = 1024
+    # How often (seconds) each process checks the shared code generation for
+    # codes issued or rotated by other workers; 0 checks on every lookup
+    PARENT_CODE_GENERATION_POLL = 1
+
+    # Per-process cache of logged-in users behind the Flask-Login user loader.
+    # The TTL bounds how long another worker's change can go unseen.
+    IDENTITY_CACHE_ENABLED = True
+    IDENTITY_CACHE_TTL = 30
+    IDENTITY_CACHE_SIZE = 4096
+
+    # Operator API (bulk import); disabled unless a token is configured
+    ADMIN_API_TOKEN = os.environ.get("ADMIN_API_TOKEN")
+    IMPORT_BATCH_SIZE = 500
+    EXPORT_CHUNK_SIZE = 1000
+
+    # Internal /metrics endpoint
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED") == "1"
+
+    # Points history pagination
+    POINTS_HISTORY_PAGE_SIZE = 20
+    POINTS_HISTORY_MAX_PAGE_SIZE = 100
+
+    # How long a stored Idempotency-Key response can be replayed
+    IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+    # Serve the `flask assets build` output (fingerprinted, gzipped) if present
+    STATIC_ASSETS_ENABLED = True
+    STATIC_ASSETS_MAX_AGE = 365 * 24 * 3600
+
+    # Compiled templates on disk (default: <instance>/jinja-bytecode), shared
+    # by all workers, and the per-process {% cache %} fragment store
+    TEMPLATE_BYTECODE_CACHE = True
+    TEMPLATE_BYTECODE_CACHE_DIR = os.environ.get("TEMPLATE_BYTECODE_CACHE_DIR")
+    TEMPLATE_FRAGMENT_CACHE_SIZE = 2048
+    TEMPLATE_FRAGMENT_CACHE_TTL = 600
+
+    # Logging goes through a bounded queue to one writer thread per process
+    # (records are dropped, and counted, when it is full). Below WARNING only
+    # the given fraction of records from each sampled logger is kept.
+    LOG_LEVEL = os.environ.get("LOG_LEVEL") or "INFO"
+    LOG_JSON = True
+    LOG_QUEUE_SIZE = 10_000
+    LOG_SAMPLE_RATES = {"core.app.blueprints.auth.routes": 0.1}
 
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    METRICS_ENABLED = True
+    # Serve source files so edits show up without rebuilding
+    STATIC_ASSETS_ENABLED = False
+    TEMPLATE_FRAGMENT_CACHE_SIZE = 0
+    LOG_LEVEL = os.environ.get("LOG_LEVEL") or "DEBUG"
+    LOG_JSON = False
 
 
 class ProductionConfig(Config):
     DEBUG = False
+    DATABASE_STARTUP = os.environ.get("DATABASE_STARTUP") or "check"
     # In production, ensure to set SECRET_KEY via environment variable
 
 
 class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    PASSWORD_HASH_WORKERS = 0
+    BCRYPT_LOG_ROUNDS = 4
+    AUTH_RATE_LIMIT_ENABLED = False
+    TEMPLATE_BYTECODE_CACHE = False
 
 
 config = {
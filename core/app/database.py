@@ -0,0 +1,182 @@
+import os
+import re
+import time
+from flask import request, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import StaticPool
+
+REPLICA_BIND = "replica"
+SAFE_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+def set_sqlite_pragmas(engine, pragmas):
+    """Run ``PRAGMA name=value`` for each pragma on every new connection"""
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    statements = [f"PRAGMA {name}={value}" for name, value in pragmas.items()]
+
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica bind when one is configured.
+
+    Reads go to the replica only while ``info["use_replica"]`` is set, which
+    the request hooks do for read-only requests. Flushes, DML statements and
+    ``SELECT ... FOR UPDATE`` always go to the primary, and once the session
+    has written, every later statement does too so it reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get("use_replica") and not self.info.get("wrote"):
+            if self._flushing or (clause is not None and _is_write(clause)):
+                self.info["wrote"] = True
+            else:
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _is_write(clause):
+    return getattr(clause, "is_dml", False) or (
+        getattr(clause, "_for_update_arg", None) is not None
+    )
+
+
+def _mark_written(session, flush_context):
+    session.info["wrote"] = True
+
+
+def use_primary(f):
+    """Always read from the primary in this view, even for GET requests"""
+    f.database_target = "primary"
+    return f
+
+
+def use_replica(f):
+    """Read from the replica in this view even for unsafe methods; writes
+    still go to the primary"""
+    f.database_target = "replica"
+    return f
+
+
+def init_engines(app, db):
+    """Apply the configured engine profile to every engine of the app and, if
+    a replica bind is configured, route reads to it per request"""
+    with app.app_context():
+        engines = db.engines
+        for engine in engines.values():
+            set_sqlite_pragmas(engine, app.config["SQLITE_PRAGMAS"])
+
+    if REPLICA_BIND not in engines:
+        return
+
+    event.listen(db.session, "after_flush", _mark_written)
+    sticky_seconds = app.config["DATABASE_REPLICA_STICKY_SECONDS"]
+
+    @app.before_request
+    def route_reads():
+        view = app.view_functions.get(request.endpoint)
+        target = getattr(view, "database_target", None)
+        if target is None:
+            # A client that wrote recently keeps reading from the primary so
+            # it sees its own writes despite replication lag
+            recent_write = flask_session.get("_primary_until", 0) > time.time()
+            target = "primary" if recent_write else "replica"
+            if request.method not in SAFE_METHODS:
+                target = "primary"
+        db.session.info["use_replica"] = target == "replica"
+
+    @app.after_request
+    def stick_to_primary(response):
+        if db.session.info.get("wrote") and sticky_seconds:
+            flask_session["_primary_until"] = time.time() + sticky_seconds
+        return response
+
+
+_REVISION = re.compile(r"^revision(?:\s*:[^=]+)?\s*=\s*['\"]([^'\"]+)['\"]", re.M)
+_DOWN_REVISION = re.compile(r"^down_revision(?:\s*:[^=]+)?\s*=\s*(.+)$", re.M)
+
+
+def migration_heads(directory):
+    """Head revision ids of the Alembic scripts in directory/versions.
+
+    Parses the ``revision``/``down_revision`` assignments directly, so the
+    check costs a directory listing rather than importing Alembic.
+    """
+    versions = os.path.join(directory, "versions")
+    if not os.path.isdir(versions):
+        return set()
+    revisions = set()
+    parents = set()
+    for name in os.listdir(versions):
+        if not name.endswith(".py"):
+            continue
+        with open(os.path.join(versions, name), encoding="utf-8") as f:
+            source = f.read()
+        revision = _REVISION.search(source)
+        if revision is None:
+            continue
+        revisions.add(revision.group(1))
+        down_revision = _DOWN_REVISION.search(source)
+        if down_revision is not None:
+            parents.update(re.findall(r"['\"]([^'\"]+)['\"]", down_revision.group(1)))
+    return revisions - parents
+
+
+def check_migration_head(app, db):
+    """Raise unless the database is stamped at the migration head(s)"""
+    heads = migration_heads(app.config["DATABASE_MIGRATIONS_DIR"])
+    if not heads:
+        raise RuntimeError(
+            f"No migration scripts found in {app.config['DATABASE_MIGRATIONS_DIR']}"
+        )
+
+    try:
+        with db.engine.connect() as conn:
+            stamped = set(
+                conn.execute(text("SELECT version_num FROM alembic_version")).scalars()
+            )
+    except DBAPIError:
+        stamped = set()
+    if stamped != heads:
+        raise RuntimeError(
+            f"Database schema is at {sorted(stamped) or 'no revision'}, "
+            f"migrations head is {sorted(heads)}; run `flask db upgrade`"
+        )
+
+
+def prepare_schema(app, db):
+    """Create or verify the schema according to DATABASE_STARTUP.
+
+    ``create`` runs ``create_all()`` on the primary (development and tests;
+    a replica gets the schema through replication), ``check`` only compares
+    the Alembic stamp with the migration head, and ``skip`` does nothing.
+    Pooled connections opened here are closed again so workers forked from
+    a preloaded app never share them.
+    """
+    mode = app.config["DATABASE_STARTUP"]
+    if mode not in ("create", "check", "skip"):
+        raise ValueError(f"Unknown DATABASE_STARTUP mode: {mode!r}")
+
+    with app.app_context():
+        if mode == "create":
+            db.create_all(bind_key=None)
+        elif mode == "check":
+            check_migration_head(app, db)
+
+        for engine in db.engines.values():
+            # In-memory SQLite lives in its single static connection
+            if not isinstance(engine.pool, StaticPool):
+                engine.dispose()
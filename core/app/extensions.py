@@ -1,15 +1,25 @@
-from flask_bcrypt import Bcrypt
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
-from flask_migrate import Migrate
+from .assets import StaticAssets
+from .database import RoutingSession
+from .hashing import HashingPool, PasswordHasher
+from .identity import IdentityCache
+from .logs import LogPipeline
+from .ratelimit import AdmissionControl
+from .templating import FragmentCache
 
 # Initialize extensions
-db = SQLAlchemy()
-bcrypt = Bcrypt()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 login_manager = LoginManager()
 csrf = CSRFProtect()
-migrate = Migrate()
+hashing_pool = HashingPool()
+password_hasher = PasswordHasher(hashing_pool)
+admission = AdmissionControl()
+identity_cache = IdentityCache(excluded=("points", "family_version"))
+static_assets = StaticAssets()
+fragment_cache = FragmentCache()
+log_pipeline = LogPipeline()
 
 # Configure login manager
 login_manager.login_view = "auth.login"
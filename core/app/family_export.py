@@ -0,0 +1,61 @@
+import csv
+import io
+import json
+from datetime import datetime
+from core.app.extensions import db
+from core.app.models.points import PointsTransaction
+from core.app.models.user import User
+
+# Tables that can be exported and the columns emitted for each, in order.
+# Password hashes never leave the database.
+EXPORTS = {
+    "users": [c for c in User.__table__.columns if c.name != "password_hash"],
+    "points": list(PointsTransaction.__table__.columns),
+}
+
+
+def export_rows(kind, after_id=None, chunk_size=1000):
+    """Yield rows of an export as dicts in primary key order.
+
+    Rows are fetched ``chunk_size`` at a time through a streaming cursor, so
+    memory stays flat however large the table is. Pass the last ``id`` seen
+    as ``after_id`` to resume an interrupted export.
+    """
+    columns = EXPORTS[kind]
+    table = columns[0].table
+    query = db.select(*columns).order_by(table.c.id)
+    if after_id is not None:
+        query = query.where(table.c.id > after_id)
+
+    result = db.session.execute(query.execution_options(yield_per=chunk_size))
+    for row in result.mappings():
+        yield {key: _plain(value) for key, value in row.items()}
+
+
+def format_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+def format_csv(rows, kind):
+    """Render rows as CSV, one chunk of text per row after the header"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=[c.name for c in EXPORTS[kind]])
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Only the header is left over when there were no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def render_export(kind, fmt, after_id=None, chunk_size=1000):
+    rows = export_rows(kind, after_id, chunk_size)
+    return format_csv(rows, kind) if fmt == "csv" else format_ndjson(rows)
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
@@ -0,0 +1,279 @@
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from core.app.extensions import db, password_hasher
+from core.app.models.user import User
+from core.app.models.parent_code import (
+    bump_code_generation,
+    is_parent_code_conflict,
+    parent_code_allocator,
+    parent_code_lookup,
+)
+from core.app.models.family_version import bump_family_versions
+
+IMPORT_FIELDS = ("username", "email", "password", "role", "parent_code")
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportResult:
+    """Running totals for an import; only the first errors are kept in memory"""
+
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def to_dict(self):
+        return {
+            "processed": self.processed,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+def read_rows(stream, fmt):
+    """Yield ``(line_number, row)`` pairs from a binary CSV or JSONL stream.
+
+    Rows are read one at a time, so memory does not depend on file size. A
+    malformed JSONL line is yielded as ``(line_number, None)``.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, {k: (v or None) for k, v in row.items() if k}
+    elif fmt == "jsonl":
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def import_families(rows, batch_size=500, progress=None):
+    """Create parent and child accounts from ``(line_number, row)`` pairs.
+
+    Each row needs username, email, password and role. A parent row may fix
+    its own ``parent_code``; a child row's ``parent_code`` links it to a
+    parent already in the database or earlier in the input. Rows are
+    processed in batches, each with one conflict query, one parallel
+    hashing pass, bulk inserts and one commit. Bad rows are reported in the
+    result and never abort the import. ``progress`` is called with the
+    ImportResult after every batch.
+    """
+    result = ImportResult()
+    batch = []
+    for line_number, row in rows:
+        batch.append((line_number, row))
+        if len(batch) >= batch_size:
+            _import_batch(batch, result)
+            batch = []
+            if progress:
+                progress(result)
+    if batch:
+        _import_batch(batch, result)
+        if progress:
+            progress(result)
+    return result
+
+
+def _import_batch(batch, result):
+    result.processed += len(batch)
+    valid = []
+    for line_number, row in batch:
+        error = _validate(row)
+        if error:
+            result.error(line_number, error)
+        else:
+            valid.append((line_number, row))
+
+    valid = _drop_conflicts(valid, result)
+    if not valid:
+        return
+
+    hashes = password_hasher.hash_many([row["password"] for _, row in valid])
+    now = datetime.utcnow()
+    records = []
+    for (line_number, row), pwhash in zip(valid, hashes):
+        records.append(
+            (
+                line_number,
+                {
+                    "username": row["username"],
+                    "email": row["email"],
+                    "password_hash": pwhash,
+                    "role": row["role"],
+                    "parent_code": row.get("parent_code"),
+                    "created_at": now,
+                },
+            )
+        )
+
+    try:
+        created, errors = _insert(records)
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent writer took a username, email or code after the
+        # conflict check; retry the batch one row at a time to isolate it
+        db.session.rollback()
+        created, errors = _insert_one_by_one(records)
+    result.created += created
+    for line_number, message in errors:
+        result.error(line_number, message)
+
+
+def _validate(row):
+    if row is None:
+        return "Malformed row"
+    not_text = [
+        f
+        for f in IMPORT_FIELDS
+        if row.get(f) is not None and not isinstance(row[f], str)
+    ]
+    if not_text:
+        return f"Field(s) must be text: {', '.join(not_text)}"
+    missing = [f for f in ("username", "email", "password", "role") if not row.get(f)]
+    if missing:
+        return f"Missing required field(s): {', '.join(missing)}"
+    if row["role"] not in ("parent", "child"):
+        return "Invalid role"
+    if row["role"] == "child" and not row.get("parent_code"):
+        return "Parent code is required for child registration"
+    return None
+
+
+def _drop_conflicts(valid, result):
+    """Remove rows clashing with existing users or earlier rows of the batch"""
+    usernames = {row["username"] for _, row in valid}
+    emails = {row["email"] for _, row in valid}
+    own_codes = {row.get("parent_code") for _, row in valid if row["role"] == "parent"}
+    existing = db.session.execute(
+        db.select(User.username, User.email, User.parent_code).where(
+            db.or_(
+                User.username.in_(usernames),
+                User.email.in_(emails),
+                User.parent_code.in_(own_codes - {None, ""}),
+            )
+        )
+    ).all()
+    taken_usernames = {r.username for r in existing}
+    taken_emails = {r.email for r in existing}
+    taken_codes = {r.parent_code for r in existing}
+
+    kept = []
+    for line_number, row in valid:
+        code = row.get("parent_code") if row["role"] == "parent" else None
+        if row["username"] in taken_usernames:
+            result.error(line_number, "Username already exists")
+        elif row["email"] in taken_emails:
+            result.error(line_number, "Email already registered")
+        elif code and code in taken_codes:
+            result.error(line_number, "Parent code already in use")
+        else:
+            taken_usernames.add(row["username"])
+            taken_emails.add(row["email"])
+            if code:
+                taken_codes.add(code)
+            kept.append((line_number, row))
+    return kept
+
+
+def _insert(records):
+    """Bulk insert parents, then children linked by parent code.
+
+    Returns the number of users inserted and ``(line_number, message)`` for
+    children whose parent code matched no parent. Parents without a code of
+    their own get one from the allocator; ``records`` keep the code the row
+    supplied, so a retry after a rollback draws a fresh one.
+    """
+    parents = [values for _, values in records if values["role"] == "parent"]
+    if parents:
+        generation = bump_code_generation(db.session)
+        parents = [
+            dict(
+                values,
+                parent_code=values["parent_code"]
+                or parent_code_allocator.next_code(db.session),
+                parent_code_generation=generation,
+            )
+            for values in parents
+        ]
+        db.session.execute(db.insert(User), parents)
+
+    children = [(n, values) for n, values in records if values["role"] == "child"]
+    parent_ids = {}
+    if children:
+        codes = {values["parent_code"] for _, values in children}
+        parent_ids = dict(
+            db.session.execute(
+                db.select(User.parent_code, User.id).where(
+                    User.parent_code.in_(codes), User.role == "parent"
+                )
+            ).all()
+        )
+
+    linked = []
+    errors = []
+    for line_number, values in children:
+        parent_id = parent_ids.get(values["parent_code"])
+        if parent_id is None:
+            errors.append((line_number, "Invalid parent code"))
+        else:
+            linked.append(dict(values, parent_code=None, parent_id=parent_id))
+    if linked:
+        db.session.execute(db.insert(User), linked)
+        bump_family_versions(
+            db.session, head_ids={values["parent_id"] for values in linked}
+        )
+
+    for values in parents:
+        parent_code_lookup.code_changed(None, values["parent_code"])
+    return len(parents) + len(linked), errors
+
+
+def _insert_one_by_one(records, attempts=3):
+    created = 0
+    errors = []
+    for line_number, values in records:
+        # An auto-assigned code that collides is drawn again, like
+        # commit_with_parent_code_retry does; a supplied one is reported
+        auto_code = values["role"] == "parent" and not values["parent_code"]
+        for attempt in range(attempts):
+            try:
+                inserted, row_errors = _insert([(line_number, values)])
+                db.session.commit()
+            except IntegrityError as e:
+                db.session.rollback()
+                if auto_code and is_parent_code_conflict(e) and attempt < attempts - 1:
+                    continue
+                errors.append((line_number, _integrity_message(e)))
+            else:
+                created += inserted
+                errors.extend(row_errors)
+            break
+    return created, errors
+
+
+def _integrity_message(error):
+    message = str(error.orig)
+    if "username" in message:
+        return "Username already exists"
+    if "email" in message:
+        return "Email already registered"
+    if "parent_code" in message:
+        return "Parent code already in use"
+    return "Could not create user"
@@ -0,0 +1,212 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+from werkzeug.security import check_password_hash, generate_password_hash
+from .metrics import percentile
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool has no free slot for another request"""
+
+    def __init__(self, retry_after=1):
+        super().__init__("Password hashing capacity exhausted")
+        self.retry_after = retry_after
+
+
+class HashingPool:
+    """Runs password hashing and verification on a bounded process pool.
+
+    Key derivation is deliberately CPU-heavy; running it in separate
+    processes keeps it off the request thread's GIL, and the bounded number
+    of pending jobs means a login spike is rejected quickly with
+    PasswordHashingBusy instead of queueing every worker behind it.
+    ``PASSWORD_HASH_WORKERS = 0`` hashes inline, which is what tests use.
+    """
+
+    def __init__(self, app=None):
+        self.workers = 0
+        self.max_pending = 1
+        self.timeout = None
+        self.start_method = None
+        self._slots = threading.BoundedSemaphore(1)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._latencies = deque(maxlen=1024)
+        self._completed = 0
+        self._rejected = 0
+        self._failed = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.workers = app.config["PASSWORD_HASH_WORKERS"]
+        self.max_pending = app.config["PASSWORD_HASH_MAX_PENDING"]
+        self.timeout = app.config["PASSWORD_HASH_TIMEOUT"]
+        self.start_method = app.config["PASSWORD_HASH_START_METHOD"]
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        app.extensions["hashing_pool"] = self
+
+    def run(self, fn, *args):
+        """Run fn(*args) on the pool, raising PasswordHashingBusy if it is full"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHashingBusy()
+
+        start = time.perf_counter()
+        try:
+            if not self.workers:
+                result = fn(*args)
+            else:
+                result = self._get_executor().submit(fn, *args).result(self.timeout)
+        except FutureTimeoutError:
+            self._record_failure()
+            raise PasswordHashingBusy()
+        except BrokenProcessPool:
+            self._record_failure()
+            self._reset_executor()
+            raise PasswordHashingBusy()
+        finally:
+            self._slots.release()
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._completed += 1
+            self._latencies.append(elapsed)
+        return result
+
+    def map(self, fn, *iterables):
+        """Run fn over iterables on the pool and return the results as a list.
+
+        Meant for batch jobs such as imports: it uses every worker and does
+        not take request slots, so it never raises PasswordHashingBusy.
+        """
+        if not self.workers:
+            return list(map(fn, *iterables))
+        return list(self._get_executor().map(fn, *iterables, chunksize=8))
+
+    def stats(self):
+        """Return counters and latency percentiles (ms) over recent operations"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "failed": self._failed,
+            }
+        for name, quantile in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99)):
+            value = percentile(latencies, quantile)
+            stats[name] = round(value * 1000, 2) if value is not None else None
+        stats["max_ms"] = round(latencies[-1] * 1000, 2) if latencies else None
+        return stats
+
+    def _get_executor(self):
+        # A pool inherited across fork (e.g. gunicorn --preload) is unusable,
+        # so each process lazily builds its own
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                context = multiprocessing.get_context(self.start_method)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=context
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _reset_executor(self):
+        with self._lock:
+            self._executor = None
+
+    def _record_failure(self):
+        with self._lock:
+            self._failed += 1
+
+
+class PasswordHasher:
+    """The application's single password hashing policy.
+
+    The policy comes from ``PASSWORD_HASH_METHOD``: ``"bcrypt"`` (cost from
+    ``BCRYPT_LOG_ROUNDS``) or any werkzeug method string such as
+    ``"scrypt:32768:8:1"`` or ``"pbkdf2:sha256:600000"``. Hashes written
+    under any supported policy still verify, and needs_rehash() reports
+    those that should be upgraded to the current one. All hashing runs on
+    the HashingPool.
+    """
+
+    def __init__(self, pool, app=None):
+        self.pool = pool
+        self.policy = None
+        self._werkzeug_prefix = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.policy = policy_from_config(app.config)
+        self._werkzeug_prefix = None
+        app.extensions["password_hasher"] = self
+
+    def hash(self, password):
+        return self.pool.run(hash_password, self.policy, password)
+
+    def hash_many(self, passwords):
+        """Hash a batch of passwords in parallel, preserving order"""
+        return self.pool.map(hash_password, [self.policy] * len(passwords), passwords)
+
+    def verify(self, pwhash, password):
+        if not pwhash:
+            return False
+        return self.pool.run(verify_password, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """Whether pwhash was made with a different scheme or cost than policy"""
+        if self.policy.startswith("bcrypt:"):
+            rounds = int(self.policy.split(":")[1])
+            return not (_is_bcrypt(pwhash) and int(pwhash[4:6]) == rounds)
+        if _is_bcrypt(pwhash):
+            return True
+        if self._werkzeug_prefix is None:
+            # werkzeug fills in default parameters ("scrypt" becomes
+            # "scrypt:32768:8:1"), so learn the stored form once
+            sample = generate_password_hash("", method=self.policy)
+            self._werkzeug_prefix = sample.split("$", 1)[0]
+        return pwhash.split("$", 1)[0] != self._werkzeug_prefix
+
+
+def policy_from_config(config):
+    method = config["PASSWORD_HASH_METHOD"]
+    if method == "bcrypt":
+        return f"bcrypt:{config['BCRYPT_LOG_ROUNDS']}"
+    return method
+
+
+# The two functions below run in pool worker processes, so they must stay
+# module-level and take only picklable arguments
+
+
+def hash_password(policy, password):
+    if policy.startswith("bcrypt:"):
+        rounds = int(policy.split(":")[1])
+        # bcrypt only uses the first 72 bytes; truncate explicitly because
+        # newer bcrypt releases raise instead of truncating silently
+        secret = password.encode("utf-8")[:72]
+        return bcrypt.hashpw(secret, bcrypt.gensalt(rounds)).decode("ascii")
+    return generate_password_hash(password, method=policy)
+
+
+def verify_password(pwhash, password):
+    if _is_bcrypt(pwhash):
+        secret = password.encode("utf-8")[:72]
+        return bcrypt.checkpw(secret, pwhash.encode("ascii"))
+    return check_password_hash(pwhash, password)
+
+
+def _is_bcrypt(pwhash):
+    return pwhash.startswith(("$2a$", "$2b$", "$2y$"))
@@ -0,0 +1,99 @@
+import threading
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from .lru import LRUCache
+
+
+class IdentityCache:
+    """Per-process LRU+TTL cache behind ``login_manager.user_loader``.
+
+    Entries are column snapshots rather than ORM objects, since a User from
+    an earlier request is detached from the session. On a hit the snapshot is
+    rebuilt into a session-bound instance without a SELECT, so relationships
+    and writes through ``current_user`` behave as usual. Columns named in
+    ``excluded`` (the points balance) are left unloaded and fetched on access.
+
+    Any flush that updates or deletes a cached model evicts it. Other workers
+    keep their copy until the TTL expires, so the TTL bounds staleness for
+    changes made elsewhere.
+    """
+
+    def __init__(self, app=None, excluded=("points",)):
+        self.excluded = frozenset(excluded)
+        self.enabled = False
+        self._entries = LRUCache(0, ttl=0)
+        self._lock = threading.Lock()
+        self._invalidations = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, session=None):
+        self.enabled = app.config["IDENTITY_CACHE_ENABLED"]
+        self._entries.ttl = app.config["IDENTITY_CACHE_TTL"]
+        self._entries.max_size = app.config["IDENTITY_CACHE_SIZE"]
+        if session is not None and not event.contains(
+            session, "after_flush", self._after_flush
+        ):
+            event.listen(session, "after_flush", self._after_flush)
+        app.extensions["identity_cache"] = self
+
+    def load(self, session, model, ident):
+        """Return the instance of model with primary key ident, or None"""
+        if not self.enabled:
+            return session.get(model, ident)
+
+        snapshot = self._entries.get((model, ident))
+        if snapshot is None:
+            instance = session.get(model, ident)
+            if instance is not None:
+                self._entries.put((model, ident), self._snapshot(instance))
+            return instance
+
+        instance = model.__mapper__.class_manager.new_instance()
+        for key, value in snapshot.items():
+            set_committed_value(instance, key, value)
+        make_transient_to_detached(instance)
+        return session.merge(instance, load=False)
+
+    def refresh(self, session, instance):
+        """Reload instance's columns from the database and cache them"""
+        session.refresh(instance)
+        if self.enabled:
+            state = inspect(instance)
+            self._entries.put(
+                (type(instance), state.identity[0]), self._snapshot(instance)
+            )
+
+    def invalidate(self, model, ident):
+        if self._entries.pop((model, ident)) is not None:
+            with self._lock:
+                self._invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        entries = self._entries
+        lookups = entries.hits + entries.misses
+        return {
+            "size": len(entries),
+            "max_size": entries.max_size,
+            "hits": entries.hits,
+            "misses": entries.misses,
+            "invalidations": self._invalidations,
+            "hit_rate": round(entries.hits / lookups, 4) if lookups else None,
+        }
+
+    def _snapshot(self, instance):
+        return {
+            attr.key: getattr(instance, attr.key)
+            for attr in inspect(instance).mapper.column_attrs
+            if attr.key not in self.excluded
+        }
+
+    def _after_flush(self, session, flush_context):
+        for instance in list(session.dirty) + list(session.deleted):
+            state = inspect(instance)
+            if state.identity is not None and len(state.identity) == 1:
+                self.invalidate(type(instance), state.identity[0])
@@ -0,0 +1,187 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask.logging import default_handler
+
+TEXT_FORMAT = "[%(asctime)s] %(levelname)s in %(module)s: %(message)s"
+
+# Attributes every LogRecord has; anything else was passed with ``extra=``
+_RECORD_ATTRIBUTES = frozenset(logging.makeLogRecord({}).__dict__) | {
+    "message",
+    "asctime",
+}
+# Arguments of these types are safe to format later on the listener thread
+_PLAIN_TYPES = (str, int, float, bool, type(None))
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, any ``extra``
+    fields and the formatted exception if there is one."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of the records below WARNING from some loggers.
+
+    ``rates`` maps logger names to the fraction kept; a name also covers its
+    child loggers. Kept records carry ``sample_rate`` so counts can be scaled
+    back up.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = dict(rates)
+        self.sampled_out = 0
+
+    def rate_for(self, name):
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        if rate is None:
+            return True
+        if random.random() >= rate:
+            self.sampled_out += 1
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class PipelineHandler(QueueHandler):
+    """QueueHandler that never blocks the logging thread.
+
+    Records with plain arguments are queued unformatted so the listener
+    thread does the work; anything else (ORM objects, exceptions) is
+    rendered here first, since formatting it later could touch state owned
+    by the request. Records are dropped and counted when the queue is full.
+    """
+
+    def __init__(self, pipeline):
+        super().__init__(None)
+        self.pipeline = pipeline
+        self.dropped = 0
+
+    def prepare(self, record):
+        args = record.args
+        if isinstance(args, dict):
+            args = args.values()
+        if args and not all(isinstance(arg, _PLAIN_TYPES) for arg in args):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record):
+        self.pipeline.ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """Route all application logging through a queue drained by one
+    background thread per process.
+
+    Installs a PipelineHandler on the root logger (replacing Flask's default
+    stderr handler) and writes JSON lines, or Flask's text format when
+    LOG_JSON is off, to stderr from a QueueListener. The listener is started
+    lazily in each process, so workers forked from a preloaded app get their
+    own.
+    """
+
+    def __init__(self, app=None):
+        self.handler = None
+        self.sampler = None
+        self.max_size = 0
+        self._target = None
+        self._listener = None
+        self._listener_pid = None
+        self._lock = threading.Lock()
+        atexit.register(self.stop)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.stop()
+        root = logging.getLogger()
+        if self.handler is not None:
+            root.removeHandler(self.handler)
+
+        self.max_size = app.config["LOG_QUEUE_SIZE"]
+        self._target = logging.StreamHandler(sys.stderr)
+        self._target.setFormatter(
+            JSONFormatter()
+            if app.config["LOG_JSON"]
+            else logging.Formatter(TEXT_FORMAT)
+        )
+        self.sampler = SamplingFilter(app.config["LOG_SAMPLE_RATES"])
+        self.handler = PipelineHandler(self)
+        self.handler.addFilter(self.sampler)
+
+        root.addHandler(self.handler)
+        root.setLevel(app.config["LOG_LEVEL"])
+        app.logger.removeHandler(default_handler)
+        app.extensions["log_pipeline"] = self
+
+    def ensure_listener(self):
+        if self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid != os.getpid():
+                # A queue inherited across fork may have been locked mid-put
+                # by a thread that does not exist in this process
+                self.handler.queue = queue.Queue(self.max_size)
+                self._listener = QueueListener(self.handler.queue, self._target)
+                self._listener.start()
+                self._listener_pid = os.getpid()
+
+    def stop(self):
+        """Flush queued records and stop this process's listener"""
+        with self._lock:
+            if self._listener is not None and self._listener_pid == os.getpid():
+                self._listener.stop()
+            self._listener = None
+            self._listener_pid = None
+
+    def stats(self):
+        if self.handler is None:
+            return {}
+        queued = self.handler.queue.qsize() if self.handler.queue is not None else 0
+        return {
+            "queued": queued,
+            "max_size": self.max_size,
+            "dropped": self.handler.dropped,
+            "sampled_out": self.sampler.sampled_out,
+        }
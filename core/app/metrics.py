@@ -0,0 +1,29 @@
+from flask import Blueprint, abort, current_app, jsonify
+
+metrics_bp = Blueprint("metrics", __name__)
+
+# name -> zero-argument callable returning a JSON-serializable dict
+_sources = {}
+
+
+def percentile(sorted_values, quantile, default=None):
+    """Nearest-rank quantile (0-1) of an ascending sequence, or default if
+    it is empty"""
+    if not sorted_values:
+        return default
+    return sorted_values[
+        min(len(sorted_values) - 1, int(quantile * len(sorted_values)))
+    ]
+
+
+def register_metrics(name, source):
+    """Expose ``source()`` under ``name`` in the /metrics payload"""
+    _sources[name] = source
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """Internal counters for capacity planning; disabled unless METRICS_ENABLED"""
+    if not current_app.config["METRICS_ENABLED"]:
+        abort(404)
+    return jsonify({name: source() for name, source in _sources.items()})
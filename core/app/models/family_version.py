@@ -0,0 +1,78 @@
+from sqlalchemy import event, inspect
+from core.app import db
+
+
+def bump_family_versions(connection, user_ids=(), head_ids=()):
+    """Increment the family version covering each user in user_ids.
+
+    A family's version lives on its head: the parent, or a child with no
+    parent. ``head_ids`` are bumped as given, for heads already known or
+    whose members no longer exist (deleted or unlinked children).
+    """
+    from core.app.models.user import User
+
+    user_ids, head_ids = set(user_ids), set(head_ids)
+    if not user_ids and not head_ids:
+        return
+    heads = db.select(db.func.coalesce(User.parent_id, User.id)).where(
+        User.id.in_(user_ids)
+    )
+    connection.execute(
+        db.update(User)
+        .where(db.or_(User.id.in_(head_ids), User.id.in_(heads.scalar_subquery())))
+        .values(family_version=User.family_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def family_version(user):
+    """Current version of the family user belongs to, read with one query"""
+    from core.app.models.user import User
+
+    head_id = user.parent_id or user.id
+    return db.session.execute(
+        db.select(User.family_version).where(User.id == head_id)
+    ).scalar()
+
+
+def collect_family_changes(session, flush_context, instances):
+    """before_flush hook noting families touched by dirty or deleted users.
+
+    Attribute history is only available before the flush, so it is read here
+    and the bump itself happens in :func:`bump_changed_families`.
+    """
+    from core.app.models.user import User
+
+    user_ids, head_ids = session.info.setdefault("family_changes", (set(), set()))
+    for instance in session.dirty:
+        if isinstance(instance, User) and session.is_modified(instance):
+            user_ids.add(instance.id)
+            # A child moving between families changes both of them
+            head_ids.update(inspect(instance).attrs.parent_id.history.deleted)
+    for instance in session.deleted:
+        if isinstance(instance, User):
+            history = inspect(instance).attrs.parent_id.history
+            head_ids.update(history.sum() or [instance.id])
+
+
+def bump_changed_families(session, flush_context):
+    """after_flush hook bumping every family written by the ORM"""
+    from core.app.models.user import User
+
+    user_ids, head_ids = session.info.pop("family_changes", (set(), set()))
+    user_ids.update(
+        instance.id for instance in session.new if isinstance(instance, User)
+    )
+    head_ids.discard(None)
+    bump_family_versions(session.connection(), user_ids, head_ids)
+
+
+def discard_family_changes(session):
+    session.info.pop("family_changes", None)
+
+
+def register_family_version_events(session):
+    if not event.contains(session, "before_flush", collect_family_changes):
+        event.listen(session, "before_flush", collect_family_changes)
+        event.listen(session, "after_flush", bump_changed_families)
+        event.listen(session, "after_rollback", discard_family_changes)
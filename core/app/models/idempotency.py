@@ -0,0 +1,34 @@
+from datetime import datetime
+from core.app import db
+
+
+class IdempotencyKey(db.Model):
+    """A client-supplied Idempotency-Key and the response it first produced.
+
+    The row is written in the same transaction as the request's changes, so
+    the unique (user, key) constraint lets only one of two concurrent
+    requests with the same key commit. Rows without a ``status_code`` are
+    claims left by older versions and are answered with a 409 until they
+    expire.
+    """
+
+    __tablename__ = "idempotency_key"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "key", name="uq_idempotency_key_user_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    # Hash of method, path and body, so a reused key with a different
+    # request is rejected instead of replaying an unrelated response
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+    mimetype = db.Column(db.String(64))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    @property
+    def completed(self):
+        return self.status_code is not None
@@ -0,0 +1,407 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from sqlalchemy import event, inspect
+from sqlalchemy.exc import IntegrityError
+from core.app import db
+from core.app.bloom import BloomFilter
+from core.app.lru import LRUCache
+
+# Crockford base32: no I, L, O or U, so codes are easy to read aloud and type
+CODE_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+CODE_LENGTH = 8
+HALF_BITS = CODE_LENGTH * 5 // 2
+HALF_MASK = (1 << HALF_BITS) - 1
+FEISTEL_ROUNDS = 4
+
+
+class ParentCodeCounter(db.Model):
+    """High-water mark of counters handed out to parent code allocators, and
+    the generation of the set of parent codes (see ParentCodeLookup)"""
+
+    __tablename__ = "parent_code_counter"
+
+    id = db.Column(db.Integer, primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False, default=0)
+    # Bumped in the same transaction as any change to user.parent_code
+    generation = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
+
+
+def bump_code_generation(connection):
+    """Record that the set of parent codes changed, in connection's transaction.
+
+    Returns the new generation; rows whose code is set in this transaction
+    store it in ``user.parent_code_generation``.
+    """
+    counter = ParentCodeCounter.__table__
+    updated = connection.execute(
+        counter.update()
+        .where(counter.c.id == 1)
+        .values(generation=counter.c.generation + 1)
+    )
+    if not updated.rowcount:
+        connection.execute(counter.insert().values(id=1, next_value=0, generation=1))
+    return current_code_generation(connection)
+
+
+def current_code_generation(connection):
+    counter = ParentCodeCounter.__table__
+    return (
+        connection.execute(
+            db.select(counter.c.generation).where(counter.c.id == 1)
+        ).scalar()
+        or 0
+    )
+
+
+class ParentCodeAllocator:
+    """Hands out unique parent codes without a lookup per code.
+
+    Each process reserves a block of counter values with a single UPDATE on
+    parent_code_counter, then turns each counter into a code with a keyed
+    Feistel permutation of the 40-bit code space. The permutation is a
+    bijection, so distinct counters always give distinct codes that still
+    look random and cannot be enumerated without the key. The unique
+    constraint on ``user.parent_code`` remains the final arbiter (for codes
+    issued before this scheme or under another key); see
+    commit_with_parent_code_retry().
+    """
+
+    def __init__(self, app=None):
+        self.block_size = 100
+        self._key = b""
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.block_size = app.config["PARENT_CODE_BLOCK_SIZE"]
+        key = app.config.get("PARENT_CODE_KEY") or app.config["SECRET_KEY"]
+        self._key = hashlib.sha256(f"parent-code:{key}".encode()).digest()
+        self.discard()
+        app.extensions["parent_code_allocator"] = self
+
+    def next_code(self, session):
+        """Return an unused code, reserving a new block through session if needed"""
+        with self._lock:
+            if self._next >= self._end or self._pid != os.getpid():
+                self._reserve_block(session)
+            counter = self._next
+            self._next += 1
+        return self.encode(counter)
+
+    def discard(self, *args):
+        """Forget the current block; its unused counters are simply skipped.
+
+        Called on rollback, because the UPDATE that reserved the block may
+        have been rolled back with it.
+        """
+        with self._lock:
+            self._next = self._end = 0
+
+    def encode(self, counter):
+        value = self._permute(counter)
+        chars = []
+        for _ in range(CODE_LENGTH):
+            value, index = divmod(value, len(CODE_ALPHABET))
+            chars.append(CODE_ALPHABET[index])
+        return "".join(reversed(chars))
+
+    def _permute(self, value):
+        left, right = value >> HALF_BITS, value & HALF_MASK
+        for round_number in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ self._round(round_number, right)
+        return (left << HALF_BITS) | right
+
+    def _round(self, round_number, half):
+        message = round_number.to_bytes(1, "big") + half.to_bytes(4, "big")
+        digest = hmac.new(self._key, message, hashlib.sha256).digest()
+        return int.from_bytes(digest[:4], "big") & HALF_MASK
+
+    def _reserve_block(self, session):
+        counter = ParentCodeCounter.__table__
+        connection = session.connection()
+        updated = connection.execute(
+            counter.update()
+            .where(counter.c.id == 1)
+            .values(next_value=counter.c.next_value + self.block_size)
+        )
+        if not updated.rowcount:
+            connection.execute(counter.insert().values(id=1, next_value=0))
+            connection.execute(
+                counter.update()
+                .where(counter.c.id == 1)
+                .values(next_value=counter.c.next_value + self.block_size)
+            )
+        end = connection.execute(
+            db.select(counter.c.next_value).where(counter.c.id == 1)
+        ).scalar_one()
+        self._next, self._end = end - self.block_size, end
+        self._pid = os.getpid()
+
+
+class ParentCodeLookup:
+    """Answers "which parent owns this code?" mostly without the database.
+
+    A Bloom filter built from the ``parent_code`` column rejects almost all
+    unknown codes (typos, guesses) in memory, and a small LRU of recent
+    positive answers serves repeated valid lookups. Only codes that pass the
+    filter but miss the LRU reach the database.
+
+    Code changes flushed by this process update the filter and evict the
+    old code from the LRU immediately. Every change also bumps the shared
+    code generation in the same transaction and stamps it on the rows whose
+    code was set. Each process polls the generation at most every
+    ``PARENT_CODE_GENERATION_POLL`` seconds (0 polls on every lookup); when
+    it moved, codes stamped since the last poll are added to the filter and
+    the LRU is cleared, so codes issued or rotated by another worker are
+    picked up within that interval. Codes that went away stay in the filter
+    (costing a database check) until the full rebuild every
+    ``PARENT_CODE_FILTER_TTL`` seconds.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 30
+        self.poll_interval = 1
+        self._filter = None
+        self._capacity = 0
+        self._built_at = 0
+        self._generation = None
+        self._polled_at = 0
+        self._added_during_rebuild = None
+        self._positive = LRUCache(1024)
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._counters = {
+            "lookups": 0,
+            "filtered": 0,
+            "cache_hits": 0,
+            "db_lookups": 0,
+            "false_positives": 0,
+            "rebuilds": 0,
+            "generation_polls": 0,
+            "catch_ups": 0,
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config["PARENT_CODE_FILTER_TTL"]
+        self._positive.max_size = app.config["PARENT_CODE_CACHE_SIZE"]
+        self.poll_interval = app.config["PARENT_CODE_GENERATION_POLL"]
+        self.reset()
+        app.extensions["parent_code_lookup"] = self
+
+    def find(self, code):
+        """Return ``(parent_id, username)`` for a parent code, or None"""
+        from core.app.models.user import User
+
+        self._count("lookups")
+        now = time.monotonic()
+        if self._filter is None or now - self._built_at > self.ttl:
+            self.rebuild()
+        elif now - self._polled_at >= self.poll_interval:
+            self._catch_up(now)
+
+        if code not in self._filter:
+            self._count("filtered")
+            return None
+
+        cached = self._positive.get(code)
+        if cached is not None:
+            self._count("cache_hits")
+            return cached
+
+        self._count("db_lookups")
+        row = db.session.execute(
+            db.select(User.id, User.username).where(
+                User.parent_code == code, User.role == "parent"
+            )
+        ).first()
+        if row is None:
+            self._count("false_positives")
+            return None
+
+        self._positive.put(code, tuple(row))
+        return tuple(row)
+
+    def rebuild(self):
+        """Rebuild the filter from the parent_code column and clear the LRU"""
+        from core.app.models.user import User
+
+        if not self._rebuild_lock.acquire(blocking=False):
+            # Another thread is rebuilding; keep serving the current filter
+            if self._filter is not None:
+                return
+            self._rebuild_lock.acquire()
+        try:
+            with self._lock:
+                self._added_during_rebuild = []
+            # Read first: a change committed during the scan then triggers
+            # another rebuild instead of being missed
+            generation = current_code_generation(db.session)
+            codes = db.select(User.parent_code).where(User.parent_code.isnot(None))
+            count = db.session.execute(
+                db.select(db.func.count()).select_from(codes.subquery())
+            ).scalar()
+            # Leave headroom for codes issued before the next rebuild
+            capacity = max(1024, count * 2)
+            bloom = BloomFilter(capacity)
+            for code in db.session.execute(
+                codes.execution_options(yield_per=10_000)
+            ).scalars():
+                bloom.add(code)
+
+            with self._lock:
+                for code in self._added_during_rebuild:
+                    bloom.add(code)
+                self._added_during_rebuild = None
+                self._filter = bloom
+                self._capacity = capacity
+                self._positive.clear()
+                self._generation = generation
+                self._built_at = self._polled_at = time.monotonic()
+                self._counters["rebuilds"] += 1
+        finally:
+            self._rebuild_lock.release()
+
+    def _catch_up(self, now):
+        """Add codes set by any process since the generation last seen"""
+        from core.app.models.user import User
+
+        self._polled_at = now
+        self._count("generation_polls")
+        seen = self._generation
+        # Read first: a change committed after the query below is then
+        # fetched again by the next poll instead of being missed
+        generation = current_code_generation(db.session)
+        if generation == seen:
+            return
+        codes = db.session.execute(
+            db.select(User.parent_code).where(
+                User.parent_code_generation > seen, User.parent_code.isnot(None)
+            )
+        ).scalars()
+        with self._lock:
+            for code in codes:
+                self._filter.add(code)
+            # Cached positives may belong to codes rotated away or deleted
+            self._positive.clear()
+            self._generation = generation
+            self._counters["catch_ups"] += 1
+            overfull = self._filter.count > self._capacity
+        if overfull:
+            self.rebuild()
+
+    def code_changed(self, old_code, new_code):
+        with self._lock:
+            if old_code:
+                self._positive.pop(old_code, None)
+            if new_code:
+                if self._filter is not None:
+                    self._filter.add(new_code)
+                if self._added_during_rebuild is not None:
+                    self._added_during_rebuild.append(new_code)
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+            self._generation = None
+            self._positive.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["filter_items"] = self._filter.count if self._filter else 0
+            stats["cache_size"] = len(self._positive)
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+
+parent_code_allocator = ParentCodeAllocator()
+parent_code_lookup = ParentCodeLookup()
+
+
+def assign_parent_codes(session, flush_context, instances):
+    """before_flush hook giving every new parent account a code, and bumping
+    the code generation for the other processes when any code changes"""
+    from core.app.models.user import User
+
+    for instance in session.new:
+        if (
+            isinstance(instance, User)
+            and instance.role == "parent"
+            and not instance.parent_code
+        ):
+            instance.parent_code = parent_code_allocator.next_code(session)
+
+    stamped = [
+        instance
+        for instance in list(session.new) + list(session.dirty)
+        if isinstance(instance, User) and _code_changed(instance)
+    ]
+    removed = any(
+        isinstance(instance, User) and instance.parent_code
+        for instance in session.deleted
+    )
+    if stamped or removed:
+        generation = bump_code_generation(session.connection())
+        for instance in stamped:
+            if instance.parent_code:
+                instance.parent_code_generation = generation
+
+
+def _code_changed(instance):
+    # A child saved with parent_code=None has history, but no code changed
+    history = inspect(instance).attrs.parent_code.history
+    return any(history.added) or any(history.deleted)
+
+
+def track_parent_code_changes(session, flush_context):
+    """after_flush hook keeping parent_code_lookup in step with this process"""
+    from core.app.models.user import User
+
+    for instance in list(session.new) + list(session.dirty):
+        if not isinstance(instance, User):
+            continue
+        history = inspect(instance).attrs.parent_code.history
+        if history.has_changes():
+            old_code = history.deleted[0] if history.deleted else None
+            new_code = history.added[0] if history.added else None
+            parent_code_lookup.code_changed(old_code, new_code)
+    for instance in session.deleted:
+        if isinstance(instance, User) and instance.parent_code:
+            parent_code_lookup.code_changed(instance.parent_code, None)
+
+
+def register_parent_code_events(session):
+    if not event.contains(session, "before_flush", assign_parent_codes):
+        event.listen(session, "before_flush", assign_parent_codes)
+        event.listen(session, "after_flush", track_parent_code_changes)
+        event.listen(session, "after_rollback", parent_code_allocator.discard)
+
+
+def is_parent_code_conflict(error):
+    return isinstance(error, IntegrityError) and "parent_code" in str(error.orig)
+
+
+def commit_with_parent_code_retry(user, attempts=3):
+    """Add and commit user, drawing a fresh parent code on a code collision"""
+    for attempt in range(attempts):
+        db.session.add(user)
+        try:
+            db.session.commit()
+            return
+        except IntegrityError as e:
+            db.session.rollback()
+            if attempt == attempts - 1 or not is_parent_code_conflict(e):
+                raise
+            user.generate_parent_code()
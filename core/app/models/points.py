@@ -0,0 +1,204 @@
+import base64
+from datetime import datetime, timedelta
+from core.app import db
+
+
+class PointsTransaction(db.Model):
+    """A single entry in a child's points ledger.
+
+    Rows are append-only: a correction is recorded as a new transaction with
+    the opposite sign, never by editing an existing one.
+    """
+
+    __tablename__ = "points_transaction"
+    __table_args__ = (
+        # Serves both the per-child history ordering and keyset pagination
+        db.Index(
+            "ix_points_transaction_child_timestamp_id", "child_id", "timestamp", "id"
+        ),
+        # Serves "rows after checkpoint N" range scans
+        db.Index("ix_points_transaction_child_id_id", "child_id", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    child_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    awarded_by_id = db.Column(db.Integer, db.ForeignKey("user.id"))
+    points = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(255))
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    @classmethod
+    def history_page(cls, child_id, limit, cursor=None):
+        """Return one page of a child's history, newest first.
+
+        Pages are addressed by a keyset cursor on ``(timestamp, id)`` rather
+        than an offset, so every page is a bounded index range scan no matter
+        how deep into the history it is. Returns ``(entries, next_cursor)``;
+        ``next_cursor`` is None on the last page.
+        """
+        query = cls.query.filter(cls.child_id == child_id)
+        if cursor:
+            timestamp, entry_id = decode_history_cursor(cursor)
+            query = query.filter(
+                db.or_(
+                    cls.timestamp < timestamp,
+                    db.and_(cls.timestamp == timestamp, cls.id < entry_id),
+                )
+            )
+
+        entries = (
+            query.order_by(cls.timestamp.desc(), cls.id.desc()).limit(limit + 1).all()
+        )
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            next_cursor = encode_history_cursor(entries[-1])
+        return entries, next_cursor
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "child_id": self.child_id,
+            "awarded_by_id": self.awarded_by_id,
+            "points": self.points,
+            "reason": self.reason,
+            "timestamp": self.timestamp.isoformat(),
+        }
+
+
+class PointsCheckpoint(db.Model):
+    """A child's balance as of (and including) ledger entry ``transaction_id``.
+
+    Checkpoints are written by ``flask points checkpoint`` so that balance
+    rebuilds and point-in-time queries only need to sum ledger rows after the
+    nearest checkpoint instead of the child's whole history.
+    """
+
+    __tablename__ = "points_checkpoint"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "child_id", "transaction_id", name="uq_points_checkpoint_child_txn"
+        ),
+        db.Index("ix_points_checkpoint_child_as_of", "child_id", "as_of"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    child_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    transaction_id = db.Column(
+        db.Integer, db.ForeignKey("points_transaction.id"), nullable=False
+    )
+    balance = db.Column(db.Integer, nullable=False)
+    # Latest timestamp of any ledger entry covered by this checkpoint
+    as_of = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    @classmethod
+    def nearest(cls, child_id, as_of=None):
+        """Return the latest checkpoint for a child, optionally at or before as_of"""
+        query = cls.query.filter(cls.child_id == child_id)
+        if as_of is not None:
+            query = query.filter(cls.as_of <= as_of)
+        return query.order_by(cls.transaction_id.desc()).first()
+
+    @classmethod
+    def write_checkpoints(cls, min_entries=100, settle_seconds=300):
+        """Write a new checkpoint for every child with enough new ledger entries.
+
+        Each checkpoint ends at the child's highest ledger id older than
+        ``settle_seconds`` and covers every entry up to that id, whatever its
+        timestamp, so a row whose id was allocated before a slower
+        transaction committed is neither skipped nor counted twice. Runs one
+        aggregate query over the un-checkpointed tail of every child and
+        returns the number of checkpoints written.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=settle_seconds)
+        latest_id = (
+            db.select(cls.child_id, db.func.max(cls.transaction_id).label("txn_id"))
+            .group_by(cls.child_id)
+            .subquery()
+        )
+        latest = (
+            db.select(cls.child_id, cls.transaction_id, cls.balance, cls.as_of)
+            .join(
+                latest_id,
+                db.and_(
+                    cls.child_id == latest_id.c.child_id,
+                    cls.transaction_id == latest_id.c.txn_id,
+                ),
+            )
+            .subquery()
+        )
+        txn = PointsTransaction
+        after_latest = txn.id > db.func.coalesce(latest.c.transaction_id, 0)
+        cut = (
+            db.select(txn.child_id, db.func.max(txn.id).label("txn_id"))
+            .outerjoin(latest, latest.c.child_id == txn.child_id)
+            .where(after_latest, txn.timestamp <= cutoff)
+            .group_by(txn.child_id)
+            .subquery()
+        )
+        tail = (
+            db.select(
+                txn.child_id,
+                cut.c.txn_id,
+                db.func.sum(txn.points),
+                db.func.max(txn.timestamp),
+                latest.c.balance,
+                latest.c.as_of,
+            )
+            .join(cut, cut.c.child_id == txn.child_id)
+            .outerjoin(latest, latest.c.child_id == txn.child_id)
+            .where(after_latest, txn.id <= cut.c.txn_id)
+            .group_by(txn.child_id, cut.c.txn_id, latest.c.balance, latest.c.as_of)
+            .having(db.func.count(txn.id) >= min_entries)
+        )
+
+        checkpoints = []
+        for child_id, txn_id, delta, tail_as_of, balance, as_of in db.session.execute(
+            tail
+        ):
+            checkpoints.append(
+                {
+                    "child_id": child_id,
+                    "transaction_id": txn_id,
+                    "balance": (balance or 0) + delta,
+                    "as_of": max(tail_as_of, as_of) if as_of else tail_as_of,
+                }
+            )
+        if checkpoints:
+            db.session.execute(db.insert(cls), checkpoints)
+        return len(checkpoints)
+
+
+def compute_balance(child_id, as_of=None):
+    """Rebuild a child's balance from the ledger, optionally at a point in time.
+
+    Starts from the nearest checkpoint and sums only the ledger entries after
+    it, so the cost depends on recent activity rather than account age.
+    """
+    checkpoint = PointsCheckpoint.nearest(child_id, as_of)
+    query = db.select(db.func.coalesce(db.func.sum(PointsTransaction.points), 0)).where(
+        PointsTransaction.child_id == child_id
+    )
+    if checkpoint:
+        query = query.where(PointsTransaction.id > checkpoint.transaction_id)
+    if as_of is not None:
+        query = query.where(PointsTransaction.timestamp <= as_of)
+
+    tail = db.session.execute(query).scalar()
+    return (checkpoint.balance if checkpoint else 0) + tail
+
+
+def encode_history_cursor(entry):
+    raw = f"{entry.timestamp.isoformat()}|{entry.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor):
+    """Decode a cursor from encode_history_cursor, raising ValueError if invalid"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, entry_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(entry_id)
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
@@ -1,8 +1,11 @@
-import uuid
 from datetime import datetime
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from core.app import db
+from core.app.extensions import password_hasher
+from core.app.models.points import PointsCheckpoint, PointsTransaction
+from core.app.models.parent_code import parent_code_allocator
+from core.app.models.family_version import bump_family_versions
+from core.app.serialization import RawJSON, Serializer
 
 
 class User(UserMixin, db.Model):
@@ -15,31 +18,116 @@ class User(UserMixin, db.Model):
 
     # New fields for parent-child relationship
     parent_code = db.Column(db.String(32), unique=True)  # For parent accounts
+    # Code generation (see ParentCodeLookup) in which parent_code was set
+    parent_code_generation = db.Column(
+        db.BigInteger, nullable=False, default=0, server_default="0", index=True
+    )
     parent_id = db.Column(db.Integer, db.ForeignKey("user.id"))  # For child accounts
 
+    # Materialized points balance for child accounts; the ledger in
+    # points_transaction is the source of truth
+    points = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Bumped on any write visible in this family's API payloads (kept on the
+    # parent, or on a child with no parent); drives conditional GET ETags
+    family_version = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+
     # Relationship fields
     children = db.relationship(
         "User", backref=db.backref("parent", remote_side=[id]), foreign_keys=[parent_id]
     )
-
-    def __init__(self, *args, **kwargs):
-        super(User, self).__init__(*args, **kwargs)
-        if self.role == "parent":
-            self.generate_parent_code()
+    points_history = db.relationship(
+        PointsTransaction,
+        foreign_keys=[PointsTransaction.child_id],
+        order_by=(PointsTransaction.timestamp.desc(), PointsTransaction.id.desc()),
+        lazy="dynamic",
+        cascade="all, delete-orphan",
+    )
+    points_checkpoints = db.relationship(
+        PointsCheckpoint, lazy="dynamic", cascade="all, delete-orphan"
+    )
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def upgrade_password_hash(self, password):
+        """Rehash a just-verified password if it predates the current policy.
+
+        Returns True if the hash changed and needs to be committed.
+        """
+        if not password_hasher.needs_rehash(self.password_hash):
+            return False
+        self.set_password(password)
+        return True
+
+    def update_points(self, points, reason=None, awarded_by=None):
+        """Append a ledger entry and apply it to the stored balance.
+
+        The balance is incremented in SQL (``points = points + :delta``) rather
+        than read-modify-written in Python, so concurrent awards are serialized
+        by the database instead of overwriting each other. Both writes happen in
+        the caller's transaction; ``self.points`` is reloaded on next access.
+        """
+        _validate_points(points)
+
+        db.session.add(
+            PointsTransaction(
+                child_id=self.id,
+                awarded_by_id=awarded_by.id if awarded_by else None,
+                points=points,
+                reason=reason,
+            )
+        )
+        self.points = User.points + points
+        db.session.flush()
+
+    @classmethod
+    def bulk_update_points(cls, child_ids, points, reason=None, awarded_by=None):
+        """Apply the same points change to many children at once.
+
+        Uses one executemany insert for the ledger rows and one set-based
+        UPDATE for the balances, all in the caller's transaction. Returns a
+        mapping of child id to new balance.
+        """
+        _validate_points(points)
+        if not child_ids:
+            return {}
+
+        awarded_by_id = awarded_by.id if awarded_by else None
+        db.session.execute(
+            db.insert(PointsTransaction),
+            [
+                {
+                    "child_id": child_id,
+                    "awarded_by_id": awarded_by_id,
+                    "points": points,
+                    "reason": reason,
+                }
+                for child_id in child_ids
+            ],
+        )
+        db.session.execute(
+            db.update(cls)
+            .where(cls.id.in_(child_ids))
+            .values(points=cls.points + points)
+        )
+        bump_family_versions(db.session, child_ids)
+        balances = db.session.execute(
+            db.select(cls.id, cls.points).where(cls.id.in_(child_ids))
+        )
+        return dict(balances.all())
 
     def generate_parent_code(self):
-        """Generate a unique parent code"""
-        while True:
-            code = str(uuid.uuid4())[:8].upper()  # Generate 8-character unique code
-            if not User.query.filter_by(parent_code=code).first():
-                self.parent_code = code
-                break
+        """Assign a fresh parent code from the allocator.
+
+        New parents get one automatically when first flushed, so this is only
+        needed to rotate an existing code.
+        """
+        self.parent_code = parent_code_allocator.next_code(db.session)
 
     def to_dict(self):
         data = {
@@ -53,6 +141,7 @@ class User(UserMixin, db.Model):
             data["parent_code"] = self.parent_code
             data["children"] = [child.to_dict_basic() for child in self.children]
         elif self.role == "child":
+            data["points"] = self.points
             data["parent"] = self.parent.to_dict_basic() if self.parent else None
         return data
 
@@ -77,3 +166,55 @@ class User(UserMixin, db.Model):
     def is_child(self):
         """Check if the user is a child"""
         return self.role == "child"
+
+
+# Precompiled equivalents of to_dict_basic() and to_dict() for API responses;
+# keep them in step with those methods
+BASIC_SERIALIZER = Serializer(
+    {
+        "id": ("id", "int"),
+        "username": ("username", "str"),
+        "email": ("email", "str"),
+        "role": ("role", "str"),
+    }
+)
+DETAIL_SERIALIZER = Serializer(
+    dict(BASIC_SERIALIZER.fields, created_at=("created_at", "datetime"))
+)
+PARENT_SERIALIZER = Serializer(
+    dict(
+        DETAIL_SERIALIZER.fields,
+        parent_code=("parent_code", "str"),
+        children=("children", [BASIC_SERIALIZER]),
+    )
+)
+CHILD_SERIALIZER = Serializer(
+    dict(
+        DETAIL_SERIALIZER.fields,
+        points=("points", "int"),
+        parent=("parent", BASIC_SERIALIZER),
+    )
+)
+ROLE_SERIALIZERS = {"parent": PARENT_SERIALIZER, "child": CHILD_SERIALIZER}
+
+
+def serialize_user(user):
+    """Precompiled to_dict() for one user"""
+    return ROLE_SERIALIZERS.get(user.role, DETAIL_SERIALIZER)(user)
+
+
+def serialize_users(users):
+    """Precompiled [user.to_dict() for user in users]"""
+    return RawJSON(
+        "["
+        + ",".join(
+            ROLE_SERIALIZERS.get(user.role, DETAIL_SERIALIZER).encode(user)
+            for user in users
+        )
+        + "]"
+    )
+
+
+def _validate_points(points):
+    if isinstance(points, bool) or not isinstance(points, int):
+        raise ValueError("Points must be an integer")
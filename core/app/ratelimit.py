@@ -0,0 +1,137 @@
+import math
+import threading
+import time
+from functools import wraps
+from flask import current_app, jsonify, request
+from .lru import LRUCache
+
+
+class TokenBuckets:
+    """Per-key token buckets held in a bounded LRU map.
+
+    Each key starts with ``burst`` tokens and regains ``per_minute`` tokens
+    per minute. Keys beyond ``max_keys`` evict the least recently used one,
+    so memory stays bounded under a scan of spoofed emails.
+    """
+
+    def __init__(self, burst, per_minute, max_keys):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self._buckets = LRUCache(max_keys)
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        """Consume a token for key; return 0 if allowed, else seconds to wait"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / self.rate if self.rate else 60
+            self._buckets.put(key, (tokens, now))
+        return wait
+
+
+class AdmissionControl:
+    """Cheap, in-process gate in front of the credential endpoints.
+
+    A request is admitted only if its client IP and submitted email both have
+    tokens left and a global concurrency slot is free; otherwise it gets a 429
+    with Retry-After before any password hashing starts. Limits are per
+    process, so the effective limit scales with the number of workers.
+    Behind a reverse proxy, set ``TRUSTED_PROXY_HOPS`` so the client IP is
+    not the proxy's.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self._by_ip = None
+        self._by_email = None
+        self._slots = threading.BoundedSemaphore(1)
+        self._lock = threading.Lock()
+        self._counters = {
+            "admitted": 0,
+            "rejected_ip": 0,
+            "rejected_email": 0,
+            "rejected_concurrency": 0,
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config["AUTH_RATE_LIMIT_ENABLED"]
+        max_keys = app.config["AUTH_RATE_LIMIT_MAX_KEYS"]
+        self._by_ip = TokenBuckets(
+            app.config["AUTH_RATE_LIMIT_IP_BURST"],
+            app.config["AUTH_RATE_LIMIT_IP_PER_MINUTE"],
+            max_keys,
+        )
+        self._by_email = TokenBuckets(
+            app.config["AUTH_RATE_LIMIT_EMAIL_BURST"],
+            app.config["AUTH_RATE_LIMIT_EMAIL_PER_MINUTE"],
+            max_keys,
+        )
+        self._slots = threading.BoundedSemaphore(
+            app.config["AUTH_MAX_CONCURRENT_HASHES"]
+        )
+        app.extensions["admission_control"] = self
+
+    def guard(self, f):
+        """Decorator applying admission control to POSTs of a credential view"""
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not self.enabled or request.method != "POST":
+                return f(*args, **kwargs)
+
+            wait = self._by_ip.take(request.remote_addr or "unknown")
+            if wait:
+                return self._reject("rejected_ip", wait)
+
+            email = _submitted_email()
+            if email:
+                wait = self._by_email.take(email)
+                if wait:
+                    return self._reject("rejected_email", wait)
+
+            if not self._slots.acquire(blocking=False):
+                return self._reject("rejected_concurrency", 1)
+            try:
+                self._count("admitted")
+                return f(*args, **kwargs)
+            finally:
+                self._slots.release()
+
+        return decorated_function
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _reject(self, counter, wait):
+        self._count(counter)
+        current_app.logger.info("Admission control rejected request: %s", counter)
+        response = jsonify(
+            {"success": False, "message": "Too many attempts, please retry later"}
+        )
+        response.status_code = 429
+        response.headers["Retry-After"] = str(max(1, math.ceil(wait)))
+        return response
+
+
+def _submitted_email():
+    if request.is_json:
+        data = request.get_json(silent=True)
+        email = data.get("email") if isinstance(data, dict) else None
+    else:
+        email = request.form.get("email")
+    if not isinstance(email, str):
+        return None
+    return email.strip().lower() or None
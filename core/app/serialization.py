@@ -0,0 +1,128 @@
+import re
+import secrets
+from json.encoder import encode_basestring_ascii
+from flask.json.provider import DefaultJSONProvider
+
+
+class RawJSON:
+    """A value that is already encoded as JSON.
+
+    :class:`FastJSONProvider` splices it into the output verbatim, so large
+    nested lists can be encoded by a :class:`Serializer` without first being
+    turned into dicts.
+    """
+
+    __slots__ = ("json",)
+
+    def __init__(self, json):
+        self.json = json
+
+
+def _encode_datetime(value):
+    return encode_basestring_ascii(value.isoformat())
+
+
+FIELD_ENCODERS = {
+    # None means the value's own str() is already valid JSON
+    "int": None,
+    "str": encode_basestring_ascii,
+    "datetime": _encode_datetime,
+}
+
+
+class Serializer:
+    """Encoder for one declared object shape, compiled into a single function.
+
+    ``fields`` maps each output key to ``(attribute, kind)``, where kind is a
+    name from FIELD_ENCODERS, another Serializer for a nested object, or a
+    one-element list ``[Serializer]`` for a list of objects. Keys are emitted
+    sorted, matching the default provider's ``sort_keys`` output.
+
+    Loaded values are read straight from the instance ``__dict__``, skipping
+    the ORM's attribute descriptors; if any is missing (unloaded or expired)
+    the encoder falls back to normal attribute access, which loads it.
+    """
+
+    def __init__(self, fields):
+        self.fields = dict(fields)
+        namespace = {}
+        parts = []
+        reads = []
+        fallbacks = []
+        values = []
+        for index, key in enumerate(sorted(self.fields)):
+            attribute, kind = self.fields[key]
+            if not attribute.isidentifier():
+                raise ValueError(f"Invalid attribute name: {attribute!r}")
+            parts.append(encode_basestring_ascii(key).replace("%", "%%") + ":%s")
+            reads.append(f"v{index} = d[{attribute!r}]")
+            fallbacks.append(f"v{index} = obj.{attribute}")
+            if isinstance(kind, list):
+                (serializer,) = kind
+                namespace[f"e{index}"] = serializer.encode_many
+                values.append(f"e{index}(v{index})")
+                continue
+            if isinstance(kind, Serializer):
+                namespace[f"e{index}"] = kind.encode
+                value = f"e{index}(v{index})"
+            elif FIELD_ENCODERS[kind] is None:
+                value = f"v{index}"
+            else:
+                namespace[f"e{index}"] = FIELD_ENCODERS[kind]
+                value = f"e{index}(v{index})"
+            values.append(f'("null" if v{index} is None else {value})')
+        namespace["template"] = "{" + ",".join(parts) + "}"
+        source = "\n".join(
+            [
+                "def encode(obj):",
+                "    try:",
+                "        d = obj.__dict__",
+                *(f"        {line}" for line in reads),
+                "    except (AttributeError, KeyError):",
+                *(f"        {line}" for line in fallbacks),
+                f"    return template % ({', '.join(values)},)",
+            ]
+        )
+        exec(source, namespace)
+        self.encode = namespace["encode"]
+
+    def encode_many(self, objs):
+        return "[" + ",".join(map(self.encode, objs)) + "]"
+
+    def __call__(self, obj):
+        """Encode obj (or None) for use in a ``jsonify`` payload"""
+        return RawJSON("null" if obj is None else self.encode(obj))
+
+    def many(self, objs):
+        """Encode an iterable of objects as a JSON list"""
+        return RawJSON(self.encode_many(objs))
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that accepts :class:`RawJSON` anywhere in a payload.
+
+    The envelope is still encoded by the stdlib encoder; each RawJSON is
+    swapped for a placeholder string on the way through and replaced by its
+    fragment afterwards. The placeholders carry a per-call nonce so payload
+    strings can never be mistaken for them.
+    """
+
+    def dumps(self, obj, **kwargs):
+        fragments = []
+        nonce = None
+        default = kwargs.pop("default", self.default)
+
+        def splice(o):
+            nonlocal nonce
+            if isinstance(o, RawJSON):
+                if nonce is None:
+                    nonce = secrets.token_hex(8)
+                fragments.append(o.json)
+                return f"\0{nonce}:{len(fragments) - 1}\0"
+            return default(o)
+
+        encoded = super().dumps(obj, default=splice, **kwargs)
+        if not fragments:
+            return encoded
+        placeholder = re.compile(rf'"\\u0000{nonce}:(\d+)\\u0000"')
+        return placeholder.sub(lambda m: fragments[int(m.group(1))], encoded)
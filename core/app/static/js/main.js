@@ -7,16 +7,6 @@ document.addEventListener('DOMContentLoaded', function() {
     // Get the current theme from localStorage or default to light
     const currentTheme = localStorage.getItem('theme') || 'light';
 
-    // Set initial states
-    themeToggleInitial.checked = currentTheme === 'dark';
-    themeToggle.checked = currentTheme === 'dark';
-
-    // Make the main toggle visible once we've set its state
-    requestAnimationFrame(() => {
-        themeToggle.style.opacity = '1';
-        themeToggleInitial.remove(); // Remove the initial toggle
-    });
-
     // Update theme classes and attributes
     function applyTheme(theme) {
         html.setAttribute('data-theme', theme);
@@ -24,19 +14,33 @@ document.addEventListener('DOMContentLoaded', function() {
         localStorage.setItem('theme', theme);
     }
 
-    // Theme toggle handler with smoother transition
-    themeToggle.addEventListener('change', function() {
-        const newTheme = this.checked ? 'dark' : 'light';
-        applyTheme(newTheme);
-    });
+    if (themeToggle) {
+        // Set initial states
+        themeToggle.checked = currentTheme === 'dark';
+        if (themeToggleInitial) {
+            themeToggleInitial.checked = currentTheme === 'dark';
+        }
+
+        // Make the main toggle visible once we've set its state
+        requestAnimationFrame(() => {
+            themeToggle.style.opacity = '1';
+            if (themeToggleInitial) {
+                themeToggleInitial.remove(); // Remove the initial toggle
+            }
+        });
+
+        // Theme toggle handler with smoother transition
+        themeToggle.addEventListener('change', function() {
+            const newTheme = this.checked ? 'dark' : 'light';
+            applyTheme(newTheme);
+        });
+    }
 
     // Ensure theme is correctly applied on page load
     applyTheme(currentTheme);
 
-    // CSRF token handling
-    const csrfToken = document.querySelector('meta[name="csrf-token"]').content;
-    console.log('CSRF Token:', csrfToken);
-
+    // Add the CSRF token to every form that does not already carry one
+    const csrfToken = getCsrfToken();
     document.querySelectorAll('form').forEach(form => {
         if (!form.querySelector('input[name="csrf_token"]')) {
             const input = document.createElement('input');
@@ -47,18 +51,6 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
-    // Add the CSRF token to all forms with the POST method
-    document.querySelectorAll('form[method="POST"]').forEach(form => {
-        if (!form.querySelector('input[name="csrf_token"]')) {
-            const csrfInput = document.createElement('input');
-            csrfInput.type = 'hidden';
-            csrfInput.name = 'csrf_token';
-            csrfInput.value = csrfToken;
-            form.appendChild(csrfInput);
-            console.log('CSRF token added to form:', form);
-        }
-    });
-
     // Flash message handling
     var alerts = document.getElementsByClassName('alert');
     Array.from(alerts).forEach(function(alert) {
@@ -73,79 +65,92 @@ document.addEventListener('DOMContentLoaded', function() {
         }, 3000);
     });
 
-    // Loader functionality
+    // Loader functionality: only shown once a navigation or request has
+    // actually taken longer than LOADER_DELAY, so fast responses never flash it
     const loaderOverlay = document.getElementById('loader-overlay');
-    const mainContent = document.getElementById('main-content');
-    let isNavigating = false;
+    const LOADER_DELAY = 300;
     let loaderTimer = null;
-    const MINIMUM_LOADER_DURATION = 1500; // Increased minimum time to 1.5 seconds
+    let pendingRequests = 0;
 
     function showLoader() {
-        if (!isNavigating) {
-            isNavigating = true;
-            loaderTimer = Date.now();
+        if (!loaderOverlay || loaderTimer) return;
+        loaderTimer = setTimeout(() => {
             document.body.style.overflow = 'hidden';
+            loaderOverlay.style.display = 'flex';
             requestAnimationFrame(() => {
-                loaderOverlay.style.display = 'flex';
-                requestAnimationFrame(() => {
-                    loaderOverlay.classList.add('show');
-                });
+                loaderOverlay.classList.add('show');
             });
-        }
+        }, LOADER_DELAY);
     }
 
     function hideLoader() {
-        const currentTime = Date.now();
-        const elapsedTime = currentTime - (loaderTimer || currentTime);
-        const remainingTime = Math.max(0, MINIMUM_LOADER_DURATION - elapsedTime);
-
+        if (!loaderOverlay) return;
+        clearTimeout(loaderTimer);
+        loaderTimer = null;
+        if (!loaderOverlay.classList.contains('show')) {
+            loaderOverlay.style.display = 'none';
+            return;
+        }
+        loaderOverlay.classList.add('fade-out');
         setTimeout(() => {
-            loaderOverlay.classList.add('fade-out');
-            setTimeout(() => {
-                loaderOverlay.classList.remove('show', 'fade-out');
-                loaderOverlay.style.display = 'none';
-                document.body.style.overflow = '';
-                isNavigating = false;
-                loaderTimer = null;
-            }, 300); // Match this with CSS transition duration
-        }, remainingTime);
+            loaderOverlay.classList.remove('show', 'fade-out');
+            loaderOverlay.style.display = 'none';
+            document.body.style.overflow = '';
+        }, 300); // Match this with CSS transition duration
     }
 
-    // Hide loader on initial page load with a slight delay
-    setTimeout(hideLoader, 500);
+    hideLoader();
 
-    // Handle browser back/forward navigation
-    window.addEventListener('popstate', () => {
-        showLoader();
-        window.location.reload();
-    });
+    // Pages restored from the back/forward cache keep their old DOM state
+    window.addEventListener('pageshow', hideLoader);
+
+    function isSameOriginPage(link) {
+        return link && link.href && !link.hasAttribute('download') &&
+            !link.hasAttribute('target') && link.origin === window.location.origin &&
+            !(link.pathname === window.location.pathname && link.hash);
+    }
 
-    // Handle clicks on links
+    // Let the browser navigate natively; the loader only appears if it is slow
     document.addEventListener('click', (e) => {
         const link = e.target.closest('a');
-        if (link && !link.hasAttribute('download') && !link.hasAttribute('target') &&
-            link.href && link.href.startsWith(window.location.origin)) {
-            e.preventDefault();
-            showLoader();
-            setTimeout(() => {
-                window.location.href = link.href;
-            }, 100);
+        if (e.defaultPrevented || e.button !== 0 || e.metaKey || e.ctrlKey ||
+            e.shiftKey || e.altKey || !isSameOriginPage(link)) {
+            return;
         }
+        showLoader();
     });
 
+    // Prefetch dashboard pages on hover so the click is served from cache
+    const prefetched = new Set();
+    function prefetchLink(e) {
+        const link = e.target.closest && e.target.closest('a');
+        if (!isSameOriginPage(link) || prefetched.has(link.href)) return;
+        if (!link.pathname.endsWith('/dashboard') && !link.hasAttribute('data-prefetch')) return;
+        prefetched.add(link.href);
+        const hint = document.createElement('link');
+        hint.rel = 'prefetch';
+        hint.href = link.href;
+        document.head.appendChild(hint);
+    }
+    document.addEventListener('mouseover', prefetchLink);
+    document.addEventListener('focusin', prefetchLink);
+    document.addEventListener('touchstart', prefetchLink, { passive: true });
+
     // Handle form submissions
     document.addEventListener('submit', (e) => {
-        if (e.target.method === 'get') return; // Don't show loader for GET forms
+        if (e.defaultPrevented || e.target.method === 'get') return; // Don't show loader for GET forms
         showLoader();
     });
 
     // Handle AJAX requests
     const originalFetch = window.fetch;
     window.fetch = function() {
+        pendingRequests++;
         showLoader();
         const promise = originalFetch.apply(this, arguments);
-        promise.finally(() => {
-            if (!document.querySelector('form[data-no-loader]')) {
+        promise.catch(() => {}).finally(() => {
+            pendingRequests--;
+            if (pendingRequests === 0) {
                 hideLoader();
             }
         });
@@ -153,22 +158,19 @@ document.addEventListener('DOMContentLoaded', function() {
     };
 
     // Handle errors and make sure loader is hidden
-    window.addEventListener('error', () => setTimeout(hideLoader, MINIMUM_LOADER_DURATION));
-    window.addEventListener('unhandledrejection', () => setTimeout(hideLoader, MINIMUM_LOADER_DURATION));
+    window.addEventListener('error', hideLoader);
+    window.addEventListener('unhandledrejection', hideLoader);
 
     // Ensure loader is hidden if page has been in background
     document.addEventListener('visibilitychange', () => {
-        if (document.visibilityState === 'visible' && isNavigating) {
+        if (document.visibilityState === 'visible' && pendingRequests === 0) {
             hideLoader();
         }
     });
 
     // Function to update the loader background based on the theme
     function updateLoaderBackground() {
-        const currentTheme = document.documentElement.getAttribute('data-theme') || 'light';
-        if (currentTheme === 'dark') {
-            loaderOverlay.style.backgroundColor = 'var(--bg-primary)';
-        } else {
+        if (loaderOverlay) {
             loaderOverlay.style.backgroundColor = 'var(--bg-primary)';
         }
     }
@@ -182,12 +184,89 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 });
 
+function getCsrfToken() {
+    const meta = document.querySelector('meta[name="csrf-token"]');
+    return meta ? meta.content : '';
+}
+
+// One key per logical submission: reused if the same submission is retried,
+// so the server applies it at most once
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+}
+
+function createHistoryItem(entry) {
+    const item = document.createElement('div');
+    item.className = 'history-item';
+
+    const change = document.createElement('div');
+    change.className = 'points-change ' + (entry.points > 0 ? 'positive' : 'negative');
+    change.textContent = (entry.points > 0 ? '+' : '') + entry.points;
+
+    const reason = document.createElement('div');
+    reason.className = 'points-reason';
+    reason.textContent = entry.reason || '';
+
+    const date = document.createElement('div');
+    date.className = 'points-date';
+    date.textContent = entry.timestamp.slice(0, 16).replace('T', ' ');
+
+    item.append(change, reason, date);
+    return item;
+}
+
+// Fetch one page of points history into #historyList. Without a cursor the
+// list is replaced by the newest page; with one the page is appended.
+async function fetchPointsHistory(cursor) {
+    const list = document.getElementById('historyList');
+    const button = document.getElementById('loadMoreHistory');
+    const url = new URL(list.dataset.historyUrl, window.location.origin);
+    if (cursor) {
+        url.searchParams.set('cursor', cursor);
+    }
+
+    const response = await fetch(url);
+    const data = await response.json();
+    if (!data.success) {
+        throw new Error(data.error || 'Failed to load history');
+    }
+
+    const items = data.data.entries.map(createHistoryItem);
+    if (cursor) {
+        list.append(...items);
+    } else {
+        list.replaceChildren(...items);
+    }
+
+    const emptyMessage = document.getElementById('noHistory');
+    if (emptyMessage) {
+        emptyMessage.hidden = list.children.length > 0;
+    }
+    button.dataset.cursor = data.data.next_cursor || '';
+    button.hidden = !data.data.next_cursor;
+}
+
+async function loadMoreHistory(button) {
+    button.disabled = true;
+    try {
+        await fetchPointsHistory(button.dataset.cursor);
+    } catch (error) {
+        alert('Error loading history');
+        console.error('Error:', error);
+    } finally {
+        button.disabled = false;
+    }
+}
+
 async function handlePointsSubmit(event) {
     event.preventDefault();
     const form = event.target;
     const points = form.points.value;
     const reason = form.reason.value;
-    const csrfToken = document.querySelector('input[name="csrf_token"]').value;
+    form.dataset.idempotencyKey = form.dataset.idempotencyKey || newIdempotencyKey();
 
     // Disable the form and show a loading state
     const submitButton = form.querySelector('button[type="submit"]');
@@ -195,19 +274,25 @@ async function handlePointsSubmit(event) {
     submitButton.textContent = 'Updating...';
 
     try {
-        const response = await fetch(`{{ url_for('parent.update_child_points', child_id=child.id) }}`, {
+        const response = await fetch(form.dataset.pointsUrl, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
-                'X-CSRFToken': csrfToken,
+                'X-CSRFToken': getCsrfToken(),
+                'Idempotency-Key': form.dataset.idempotencyKey,
             },
             body: JSON.stringify({ points: parseInt(points), reason }),
         });
 
         const data = await response.json();
+        if (response.status !== 409) {
+            delete form.dataset.idempotencyKey;
+        }
         if (data.success) {
-            // Reload the page to show updated points
-            window.location.reload();
+            // Update the balance and history in place
+            document.getElementById('childPoints').textContent = data.data.current_points;
+            form.reset();
+            await fetchPointsHistory();
         } else {
             alert(data.error || 'Failed to update points');
         }
@@ -220,5 +305,3 @@ async function handlePointsSubmit(event) {
         submitButton.textContent = 'Update Points';
     }
 }
-
-<meta name="csrf-token" content="YOUR_CSRF_TOKEN_HERE"></meta>
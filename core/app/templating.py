@@ -0,0 +1,122 @@
+import os
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from .lru import LRUCache
+
+
+class CountingBytecodeCache(FileSystemBytecodeCache):
+    """On-disk compiled template cache that counts hits and misses.
+
+    Files are keyed by template name and source checksum and written
+    atomically, so every worker on the host can share one directory and a
+    freshly forked worker skips compiling templates another has compiled.
+    """
+
+    def __init__(self, directory):
+        super().__init__(directory, "%s.jinja-cache")
+        self.hits = 0
+        self.misses = 0
+
+    def load_bytecode(self, bucket):
+        super().load_bytecode(bucket)
+        if bucket.code is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+
+class FragmentCacheExtension(Extension):
+    """``{% cache key, ... %}...{% endcache %}`` backed by a FragmentCache.
+
+    Keys must change whenever the rendered content would, e.g. by including
+    the family version. Without a cache attached the body is always rendered.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_render", [nodes.List(key)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, key, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        return cache.get_or_render(tuple(key), caller)
+
+
+class FragmentCache:
+    """Per-process LRU+TTL store for rendered template fragments.
+
+    Entries are never invalidated: callers version their keys instead, and
+    the TTL only bounds how long unreachable old versions occupy memory.
+    A size of 0 disables caching.
+    """
+
+    def __init__(self, app=None):
+        self.bytecode_cache = None
+        self._entries = LRUCache(0, ttl=0)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._entries.ttl = app.config["TEMPLATE_FRAGMENT_CACHE_TTL"]
+        self._entries.max_size = app.config["TEMPLATE_FRAGMENT_CACHE_SIZE"]
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.jinja_env.fragment_cache = self
+
+        if app.config["TEMPLATE_BYTECODE_CACHE"]:
+            directory = app.config["TEMPLATE_BYTECODE_CACHE_DIR"] or os.path.join(
+                app.instance_path, "jinja-bytecode"
+            )
+            os.makedirs(directory, exist_ok=True)
+            self.bytecode_cache = CountingBytecodeCache(directory)
+            app.jinja_env.bytecode_cache = self.bytecode_cache
+        app.extensions["fragment_cache"] = self
+
+    def get_or_render(self, key, render):
+        if not self._entries.max_size:
+            return render()
+
+        html = self._entries.get(key)
+        if html is None:
+            # Rendered outside the lock; concurrent misses may both render
+            html = render()
+            self._entries.put(key, html)
+        return html
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        entries = self._entries
+        lookups = entries.hits + entries.misses
+        stats = {
+            "fragments": {
+                "size": len(entries),
+                "max_size": entries.max_size,
+                "hits": entries.hits,
+                "misses": entries.misses,
+                "hit_rate": round(entries.hits / lookups, 4) if lookups else None,
+            }
+        }
+        if self.bytecode_cache is not None:
+            cache = self.bytecode_cache
+            loads = cache.hits + cache.misses
+            stats["bytecode"] = {
+                "directory": cache.directory,
+                "hits": cache.hits,
+                "misses": cache.misses,
+                "hit_rate": round(cache.hits / loads, 4) if loads else None,
+            }
+        return stats
@@ -1,4 +1,12 @@
 # This file makes the utils directory a Python package
-from .decorators import parent_required, child_required
+from .decorators import parent_required, child_required, admin_token_required
+from .idempotency import idempotent
+from .conditional import family_etag
 
-__all__ = ["parent_required", "child_required"]
+__all__ = [
+    "parent_required",
+    "child_required",
+    "admin_token_required",
+    "idempotent",
+    "family_etag",
+]
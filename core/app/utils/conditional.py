@@ -0,0 +1,37 @@
+from functools import wraps
+from flask import current_app, make_response, request
+from flask_login import current_user
+from core.app.extensions import db, identity_cache
+from core.app.models.family_version import family_version
+
+
+def family_etag(f):
+    """Answer conditional GETs of a view from the family version counter.
+
+    The strong ETag combines the endpoint, the current user and the version
+    of their family, which is bumped by every write that can change the
+    payload. A matching ``If-None-Match`` gets a 304 after a single-column
+    lookup, before the view loads or serializes anything. On a miss
+    ``current_user`` is reloaded first: it may come from another worker's
+    stale identity cache snapshot, and the payload must match the version
+    in its ETag. Must be applied after the login check.
+    """
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        version = family_version(current_user)
+        etag = f"{request.endpoint}-{current_user.id}-{version}"
+
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            identity_cache.refresh(db.session, current_user._get_current_object())
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        # Let clients cache but always revalidate, since payloads are per user
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    return decorated_function
@@ -1,5 +1,6 @@
+import hmac
 from functools import wraps
-from flask import flash, redirect, url_for
+from flask import abort, current_app, flash, jsonify, redirect, request, url_for
 from flask_login import current_user
 
 
@@ -23,3 +24,19 @@ def child_required(f):
         return f(*args, **kwargs)
 
     return decorated_function
+
+
+def admin_token_required(f):
+    """Require ``Authorization: Bearer <ADMIN_API_TOKEN>``; 404 when unset"""
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = current_app.config.get("ADMIN_API_TOKEN")
+        if not token:
+            abort(404)
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+            return jsonify({"success": False, "message": "Invalid admin token"}), 401
+        return f(*args, **kwargs)
+
+    return decorated_function
@@ -0,0 +1,136 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
+from flask_login import current_user
+from sqlalchemy.exc import IntegrityError
+from core.app.extensions import db
+from core.app.models.idempotency import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def idempotent(f):
+    """Honor an ``Idempotency-Key`` header on a mutating endpoint.
+
+    The decorated view flushes its changes instead of committing them; the
+    decorator commits once, together with the stored response when a key was
+    sent, so a crash leaves neither the change nor a half-recorded key behind.
+    Repeats within ``IDEMPOTENCY_KEY_TTL`` get the stored response back
+    without the view running again. If a concurrent repeat commits first,
+    this request's changes are rolled back and the repeat's response is
+    returned. Server errors are rolled back and not stored, so the client can
+    retry with the same key. Must be applied after the login check.
+    """
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            response = _run(f, args, kwargs)
+            if response.status_code < 500:
+                db.session.commit()
+            return response
+        if len(key) > 255:
+            return (
+                jsonify({"success": False, "error": "Idempotency-Key is too long"}),
+                400,
+            )
+
+        fingerprint = _fingerprint()
+        now = datetime.utcnow()
+
+        existing = _find(key)
+        if existing and existing.expires_at > now:
+            return _replay(existing, fingerprint)
+
+        response = _run(f, args, kwargs)
+        if response.status_code >= 500:
+            return response
+
+        # Evict expired keys (including a stale row for this key) in the same
+        # transaction, so the table stays bounded without a separate sweeper
+        db.session.execute(
+            db.delete(IdempotencyKey).where(IdempotencyKey.expires_at <= now)
+        )
+        db.session.add(
+            IdempotencyKey(
+                user_id=current_user.id,
+                key=key,
+                fingerprint=fingerprint,
+                status_code=response.status_code,
+                response_body=response.get_data(as_text=True),
+                mimetype=response.mimetype,
+                expires_at=now + current_app.config["IDEMPOTENCY_KEY_TTL"],
+            )
+        )
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            existing = _find(key)
+            if existing is None:
+                return _in_progress()
+            return _replay(existing, fingerprint)
+        return response
+
+    return decorated_function
+
+
+def _run(f, args, kwargs):
+    """Call the view, rolling its changes back if it fails"""
+    try:
+        response = make_response(f(*args, **kwargs))
+    except Exception:
+        db.session.rollback()
+        raise
+    if response.status_code >= 500:
+        db.session.rollback()
+    return response
+
+
+def _find(key):
+    return IdempotencyKey.query.filter_by(user_id=current_user.id, key=key).first()
+
+
+def _fingerprint():
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(b"\0")
+    digest.update(request.path.encode())
+    digest.update(b"\0")
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _replay(record, fingerprint):
+    if record.fingerprint != fingerprint:
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": "Idempotency-Key was already used for a different request",
+                }
+            ),
+            422,
+        )
+    if not record.completed:
+        return _in_progress()
+
+    response = current_app.response_class(
+        record.response_body, status=record.status_code, mimetype=record.mimetype
+    )
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def _in_progress():
+    return (
+        jsonify(
+            {
+                "success": False,
+                "error": "A request with this Idempotency-Key is in progress",
+            }
+        ),
+        409,
+    )
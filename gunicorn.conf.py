@@ -0,0 +1,57 @@
+"""gunicorn settings for ``wsgi:app``.
+
+Every setting can still be overridden on the command line. WEB_CONCURRENCY
+and GUNICORN_THREADS override the CPU-based worker and thread counts; use
+``flask server benchmark`` to compare settings on a given host.
+"""
+
+import multiprocessing
+import os
+
+cpus = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT') or 8000}"
+
+# Requests mostly wait on the database or on the password hashing pool, so a
+# few threads per worker keep a core busy; thread counts also keep the
+# per-process fragment and identity caches warm for more requests than extra
+# worker processes would.
+# Config.WEB_CONCURRENCY repeats this default to split the cores between the
+# workers' password hashing pools
+workers = int(os.environ.get("WEB_CONCURRENCY") or max(2, cpus + 1))
+threads = int(os.environ.get("GUNICORN_THREADS") or (4 if cpus <= 2 else 2))
+worker_class = "gthread" if threads > 1 else "sync"
+
+# Recycle workers to bound slow memory growth; the jitter keeps them from all
+# restarting at once
+max_requests = 1000
+max_requests_jitter = 100
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+# Import and build the app once in the arbiter so workers start instantly and
+# share its memory. Code changes therefore need a full restart, not a HUP.
+preload_app = True
+
+# Heartbeat files on a RAM disk; a slow disk can otherwise stall workers
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the arbiter.
+
+    A pooled connection shared by two processes corrupts both ends, so each
+    worker starts with empty pools. ``close=False`` leaves the sockets to the
+    arbiter instead of closing them out from under it.
+    """
+    if not server.cfg.preload_app:
+        return
+
+    from core.app.extensions import db
+
+    app = server.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -1,6 +1,4 @@
-from flask import redirect, url_for
-from core.app import create_app, db
-from flask_migrate import Migrate
+from core.app import create_app
 
 
 def register_error_handlers(app):
@@ -17,15 +15,9 @@ def register_error_handlers(app):
 
 # Create the application instance
 app = create_app()
-migrate = Migrate(app, db)
 # Register error handlers
 register_error_handlers(app)
 
 
-@app.route("/", methods=["GET"])
-def landing():
-    return redirect(url_for("auth.login"))
-
-
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
@@ -0,0 +1,58 @@
+from collections import namedtuple
+import pytest
+from core.app import create_app
+from core.app.extensions import db, fragment_cache, identity_cache
+from core.app.models.user import User
+
+PASSWORD = "correct-horse"
+
+Family = namedtuple("Family", "parent_id parent_email child_ids")
+
+
+@pytest.fixture
+def app():
+    # Requests must run outside any app context of the test itself, or they
+    # would share its session and g (and with it the logged-in user)
+    identity_cache.clear()
+    fragment_cache.clear()
+    return create_app("testing")
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_family(app, name="parent", children=2):
+    """Commit a parent with some children and return their ids"""
+    with app.app_context():
+        parent = User(username=name, email=f"{name}@example.com", role="parent")
+        parent.set_password(PASSWORD)
+        db.session.add(parent)
+        db.session.flush()
+        members = []
+        for index in range(children):
+            child = User(
+                username=f"{name}-child{index}",
+                email=f"{name}-child{index}@example.com",
+                role="child",
+                parent_id=parent.id,
+            )
+            child.set_password(PASSWORD)
+            members.append(child)
+        db.session.add_all(members)
+        db.session.commit()
+        return Family(parent.id, parent.email, [child.id for child in members])
+
+
+@pytest.fixture
+def family(app):
+    return make_family(app)
+
+
+def login(client, email):
+    response = client.post(
+        "/auth/api/login", json={"email": email, "password": PASSWORD}
+    )
+    assert response.status_code == 200, response.get_json()
+    return response
@@ -0,0 +1,4 @@
+def test_landing_redirects_to_login(client):
+    response = client.get("/")
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/auth/login"
@@ -0,0 +1,64 @@
+import pytest
+from tests.conftest import login, make_family
+
+
+@pytest.fixture
+def parent_client(app, client, family):
+    app.config["WTF_CSRF_ENABLED"] = False
+    login(client, family.parent_email)
+    return client
+
+
+def _bulk(client, **body):
+    return client.post("/parent/children/points", json=dict(body, reason="chores"))
+
+
+def _balances(client, child_ids):
+    return [
+        client.get(f"/parent/api/children/{child_id}").get_json()["child"]["points"]
+        for child_id in child_ids
+    ]
+
+
+def test_applies_to_owned_children_and_reports_the_rest(app, parent_client, family):
+    other = make_family(app, "other", children=1)
+    first, second = family.child_ids
+
+    response = _bulk(parent_client, points=5, child_ids=[second, other.child_ids[0]])
+
+    assert response.status_code == 200
+    assert response.get_json()["data"]["results"] == [
+        {"child_id": second, "success": True, "current_points": 5},
+        {
+            "child_id": other.child_ids[0],
+            "success": False,
+            "error": "Child not found or not associated with this parent",
+        },
+    ]
+    assert _balances(parent_client, [first, second]) == [0, 5]
+
+
+def test_all_selects_every_own_child(app, parent_client, family):
+    make_family(app, "other", children=1)
+
+    response = _bulk(parent_client, points=3, all=True)
+
+    results = response.get_json()["data"]["results"]
+    assert sorted(r["child_id"] for r in results) == sorted(family.child_ids)
+    assert all(r["current_points"] == 3 for r in results)
+
+
+def test_duplicate_ids_are_applied_once(parent_client, family):
+    child_id = family.child_ids[0]
+
+    response = _bulk(parent_client, points=2, child_ids=[child_id, child_id])
+
+    assert response.get_json()["data"]["results"] == [
+        {"child_id": child_id, "success": True, "current_points": 2}
+    ]
+    assert _balances(parent_client, [child_id]) == [2]
+
+
+def test_json_array_body_is_rejected(parent_client):
+    response = parent_client.post("/parent/children/points", json=[1, 2])
+    assert response.status_code == 400
@@ -0,0 +1,43 @@
+from core.app.extensions import db
+from core.app.models.family_version import bump_family_versions
+from core.app.models.user import User
+from tests.conftest import login
+
+
+def test_dashboard_revalidates_against_family_version(app, client, family):
+    login(client, family.parent_email)
+    etag = client.get("/parent/api/dashboard").headers["ETag"]
+
+    cached = client.get("/parent/api/dashboard", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    with app.app_context():
+        db.session.get(User, family.child_ids[0]).update_points(5, "chores")
+        db.session.commit()
+    changed = client.get("/parent/api/dashboard", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_miss_serializes_fresh_user_despite_cached_identity(app, client, family):
+    login(client, family.parent_email)
+    etag = client.get("/parent/api/dashboard").headers["ETag"]
+
+    # Another worker rotates the code: this process's identity cache still
+    # holds the old snapshot, only the family version says otherwise
+    with app.app_context():
+        db.session.execute(
+            db.update(User)
+            .where(User.id == family.parent_id)
+            .values(parent_code="ROTATED1")
+        )
+        bump_family_versions(db.session, head_ids=[family.parent_id])
+        db.session.commit()
+
+    response = client.get("/parent/api/dashboard", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.get_json()["data"]["parent_code"] == "ROTATED1"
+
+    me = client.get("/auth/api/me")
+    assert me.get_json()["user"]["parent_code"] == "ROTATED1"
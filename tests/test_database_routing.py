@@ -0,0 +1,90 @@
+import sqlite3
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from core.app import create_app
+from core.app.config import TestingConfig, engine_options, replica_binds
+from core.app.extensions import db
+from core.app.models.user import User
+from tests.conftest import login, make_family
+
+
+@pytest.fixture
+def replicated_app(tmp_path, monkeypatch):
+    primary = tmp_path / "primary.db"
+    replica = tmp_path / "replica.db"
+    uri = f"sqlite:///{primary}"
+    monkeypatch.setattr(TestingConfig, "SQLALCHEMY_DATABASE_URI", uri)
+    monkeypatch.setattr(TestingConfig, "SQLALCHEMY_ENGINE_OPTIONS", engine_options(uri))
+    monkeypatch.setattr(
+        TestingConfig, "SQLALCHEMY_BINDS", replica_binds(f"sqlite:///{replica}")
+    )
+    app = create_app("testing")
+    app.family = make_family(app)
+
+    # Seed the replica with a copy of the primary, as replication would
+    with sqlite3.connect(primary) as source, sqlite3.connect(replica) as target:
+        source.backup(target)
+    return app
+
+
+@contextmanager
+def engine_usage(app):
+    """Record which engines run statements: a set of "primary"/"replica" """
+    with app.app_context():
+        engines = {"primary": db.engine, "replica": db.engines["replica"]}
+    used = set()
+    listeners = []
+    for name, engine in engines.items():
+
+        def record(*args, name=name):
+            used.add(name)
+
+        event.listen(engine, "before_cursor_execute", record)
+        listeners.append((engine, record))
+    try:
+        yield used
+    finally:
+        for engine, record in listeners:
+            event.remove(engine, "before_cursor_execute", record)
+
+
+def test_reads_go_to_replica(replicated_app):
+    client = replicated_app.test_client()
+    login(client, replicated_app.family.parent_email)
+
+    with engine_usage(replicated_app) as used:
+        assert client.get("/parent/api/children").status_code == 200
+    assert used == {"replica"}
+
+
+def test_writes_go_to_primary_and_stick(replicated_app):
+    replicated_app.config["WTF_CSRF_ENABLED"] = False
+    family = replicated_app.family
+    client = replicated_app.test_client()
+    login(client, family.parent_email)
+
+    with engine_usage(replicated_app) as used:
+        response = client.post(
+            f"/parent/children/{family.child_ids[0]}/points",
+            json={"points": 3, "reason": "chores"},
+        )
+        assert response.status_code == 200
+    assert used == {"primary"}
+
+    # The replica has not seen the write; this client reads its own anyway
+    with engine_usage(replicated_app) as used:
+        response = client.get(f"/parent/api/children/{family.child_ids[0]}")
+    assert used == {"primary"}
+    assert response.get_json()["child"]["points"] == 3
+
+
+def test_use_primary_view_reads_primary(replicated_app):
+    with replicated_app.app_context():
+        code = db.session.get(User, replicated_app.family.parent_id).parent_code
+    client = replicated_app.test_client()
+
+    with engine_usage(replicated_app) as used:
+        response = client.get(f"/auth/api/parent-code/{code}")
+    assert response.get_json()["valid"]
+    assert used == {"primary"}
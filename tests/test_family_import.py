@@ -0,0 +1,83 @@
+import io
+import json
+from core.app.extensions import db
+from core.app.family_import import import_families, read_rows
+from core.app.models.parent_code import parent_code_allocator
+from core.app.models.user import User
+
+
+def _import(app, data, fmt):
+    with app.app_context():
+        return import_families(read_rows(io.BytesIO(data), fmt))
+
+
+def test_jsonl_parent_without_parent_code_gets_one(app):
+    rows = [
+        {
+            "username": "p1",
+            "email": "p1@example.com",
+            "password": "pw",
+            "role": "parent",
+        },
+        {
+            "username": "p2",
+            "email": "p2@example.com",
+            "password": "pw",
+            "role": "parent",
+        },
+    ]
+    data = "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+    result = _import(app, data, "jsonl")
+
+    assert (result.created, result.failed) == (2, 0)
+    with app.app_context():
+        codes = db.session.execute(db.select(User.parent_code)).scalars().all()
+    assert len(codes) == 2 and all(codes)
+
+
+def test_csv_without_parent_code_column(app):
+    data = b"username,email,password,role\np1,p1@example.com,pw,parent\n"
+
+    result = _import(app, data, "csv")
+
+    assert (result.created, result.failed) == (1, 0)
+
+
+def test_non_text_fields_are_row_errors(app):
+    rows = [
+        {"username": "p1", "email": "p1@example.com", "password": 12345},
+        {"username": ["x"], "email": "p2@example.com", "password": "pw"},
+        {"username": "p3", "email": "p3@example.com", "password": "pw"},
+    ]
+    data = "".join(json.dumps(dict(row, role="parent")) + "\n" for row in rows)
+
+    result = _import(app, data.encode(), "jsonl")
+
+    assert (result.created, result.failed) == (1, 2)
+    assert result.errors == [
+        {"line": 1, "error": "Field(s) must be text: password"},
+        {"line": 2, "error": "Field(s) must be text: username"},
+    ]
+
+
+def test_colliding_auto_assigned_code_is_drawn_again(app, family, monkeypatch):
+    with app.app_context():
+        taken = db.session.get(User, family.parent_id).parent_code
+    next_code = parent_code_allocator.next_code
+    codes = iter([taken])
+
+    def collide_once(session):
+        return next(codes, None) or next_code(session)
+
+    monkeypatch.setattr(parent_code_allocator, "next_code", collide_once)
+    data = b"username,email,password,role\np1,p1@example.com,pw,parent\n"
+
+    result = _import(app, data, "csv")
+
+    assert (result.created, result.failed) == (1, 0)
+    with app.app_context():
+        code = db.session.execute(
+            db.select(User.parent_code).where(User.username == "p1")
+        ).scalar()
+    assert code and code != taken
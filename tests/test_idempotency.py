@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+import pytest
+from core.app.extensions import db
+from core.app.models.idempotency import IdempotencyKey
+from core.app.models.points import PointsTransaction
+from core.app.models.user import User
+from core.app.utils.idempotency import _fingerprint
+from tests.conftest import login
+
+
+@pytest.fixture
+def parent_client(app, client, family):
+    app.config["WTF_CSRF_ENABLED"] = False
+    login(client, family.parent_email)
+    return client
+
+
+def _award_request(child_id, points=5):
+    return {
+        "path": f"/parent/children/{child_id}/points",
+        "method": "POST",
+        "json": {"points": points, "reason": "chores"},
+    }
+
+
+def _award(client, child_id, key, points=5):
+    return client.open(
+        **_award_request(child_id, points), headers={"Idempotency-Key": key}
+    )
+
+
+def _ledger_size(app, child_id):
+    with app.app_context():
+        return db.session.scalar(
+            db.select(db.func.count()).where(PointsTransaction.child_id == child_id)
+        )
+
+
+def test_repeat_replays_stored_response(app, parent_client, family):
+    child_id = family.child_ids[0]
+
+    first = _award(parent_client, child_id, "key-1")
+    repeat = _award(parent_client, child_id, "key-1")
+
+    assert first.status_code == repeat.status_code == 200
+    assert repeat.headers["Idempotent-Replayed"] == "true"
+    assert repeat.get_json() == first.get_json()
+    assert _ledger_size(app, child_id) == 1
+
+
+def test_key_reused_for_different_request_is_rejected(app, parent_client, family):
+    child_id = family.child_ids[0]
+
+    _award(parent_client, child_id, "key-1")
+    response = _award(parent_client, child_id, "key-1", points=7)
+
+    assert response.status_code == 422
+    assert _ledger_size(app, child_id) == 1
+
+
+def test_unfinished_claim_is_in_progress(app, parent_client, family):
+    child_id = family.child_ids[0]
+    with app.test_request_context(**_award_request(child_id)):
+        fingerprint = _fingerprint()
+    with app.app_context():
+        db.session.add(
+            IdempotencyKey(
+                user_id=family.parent_id,
+                key="key-1",
+                fingerprint=fingerprint,
+                expires_at=datetime.utcnow() + timedelta(hours=1),
+            )
+        )
+        db.session.commit()
+
+    response = _award(parent_client, child_id, "key-1")
+
+    assert response.status_code == 409
+    assert _ledger_size(app, child_id) == 0
+
+
+class WorkerKilled(BaseException):
+    """Stands in for the process dying: no error handling runs"""
+
+
+def test_worker_dying_mid_request_leaves_key_free_for_retry(
+    app, parent_client, family, monkeypatch
+):
+    child_id = family.child_ids[0]
+    update_points = User.update_points
+
+    def die_after_ledger_write(self, *args, **kwargs):
+        update_points(self, *args, **kwargs)
+        raise WorkerKilled()
+
+    monkeypatch.setattr(User, "update_points", die_after_ledger_write)
+    with pytest.raises(WorkerKilled):
+        _award(parent_client, child_id, "key-1")
+    assert _ledger_size(app, child_id) == 0
+
+    monkeypatch.setattr(User, "update_points", update_points)
+    retry = _award(parent_client, child_id, "key-1")
+    assert retry.status_code == 200
+    assert "Idempotent-Replayed" not in retry.headers
+    assert _ledger_size(app, child_id) == 1
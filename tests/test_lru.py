@@ -0,0 +1,33 @@
+from core.app.lru import LRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("core.app.lru.time.monotonic", lambda: now[0])
+    cache = LRUCache(10, ttl=5)
+    cache.put("a", 1)
+
+    now[0] += 4
+    assert cache.get("a") == 1
+    now[0] += 1
+    assert cache.get("a", "missing") == "missing"
+    assert len(cache) == 0
+
+
+def test_pop_returns_value():
+    cache = LRUCache(10)
+    cache.put("a", 1)
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "gone") == "gone"
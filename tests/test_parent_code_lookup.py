@@ -0,0 +1,95 @@
+import io
+from core.app.extensions import db
+from core.app.family_import import import_families, read_rows
+from core.app.models.parent_code import ParentCodeLookup, current_code_generation
+from core.app.models.user import User
+from tests.conftest import make_family
+
+
+def _other_worker(poll_interval=0):
+    """A lookup that, like one in another process, sees no local flushes"""
+    lookup = ParentCodeLookup()
+    lookup.poll_interval = poll_interval
+    return lookup
+
+
+def _rotate(app, parent_id):
+    with app.app_context():
+        parent = db.session.get(User, parent_id)
+        old_code = parent.parent_code
+        parent.generate_parent_code()
+        db.session.commit()
+        return old_code, parent.parent_code
+
+
+def test_rotation_by_another_worker_is_picked_up(app, family):
+    other = _other_worker()
+    with app.app_context():
+        old_code = db.session.get(User, family.parent_id).parent_code
+        assert other.find(old_code) == (family.parent_id, "parent")
+
+    old_code, new_code = _rotate(app, family.parent_id)
+
+    with app.app_context():
+        assert other.find(old_code) is None
+        assert other.find(new_code) == (family.parent_id, "parent")
+    assert other.stats()["rebuilds"] == 1
+    assert other.stats()["catch_ups"] == 1
+
+
+def test_new_parent_from_another_worker_is_picked_up(app, family):
+    other = _other_worker()
+    with app.app_context():
+        other.find("NOSUCHCD")
+        parent = User(username="late", email="late@example.com", role="parent")
+        parent.set_password("pw")
+        db.session.add(parent)
+        db.session.commit()
+
+        assert other.find(parent.parent_code) == (parent.id, "late")
+    assert other.stats()["rebuilds"] == 1
+
+
+def test_imported_parents_are_added_without_rebuild(app):
+    other = _other_worker()
+    with app.app_context():
+        other.find("NOSUCHCD")
+        data = b"username,email,password,role\np1,p1@example.com,pw,parent\n"
+        import_families(read_rows(io.BytesIO(data), "csv"))
+        parent = db.session.execute(
+            db.select(User).where(User.username == "p1")
+        ).scalar_one()
+
+        assert other.find(parent.parent_code) == (parent.id, "p1")
+    assert other.stats()["rebuilds"] == 1
+
+
+def test_new_child_leaves_generation_alone(app, family):
+    with app.app_context():
+        before = current_code_generation(db.session)
+        make_family(app, "more", children=0)
+        after_parent = current_code_generation(db.session)
+        child = User(
+            username="kid", email="kid@example.com", role="child", parent_code=None
+        )
+        child.set_password("pw")
+        child.parent_id = family.parent_id
+        db.session.add(child)
+        db.session.commit()
+
+        assert after_parent == before + 1
+        assert current_code_generation(db.session) == after_parent
+
+
+def test_generation_is_polled_at_most_once_per_interval(app, family):
+    other = _other_worker(poll_interval=3600)
+    with app.app_context():
+        old_code = db.session.get(User, family.parent_id).parent_code
+        other.find(old_code)
+
+    _rotate(app, family.parent_id)
+
+    with app.app_context():
+        # Within the interval the cached answer stands
+        assert other.find(old_code) == (family.parent_id, "parent")
+        assert other.stats()["generation_polls"] == 0
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+from core.app.extensions import db
+from core.app.models.points import (
+    PointsCheckpoint,
+    PointsTransaction,
+    compute_balance,
+)
+
+
+def _ledger(child_id, *entries):
+    db.session.execute(
+        db.insert(PointsTransaction),
+        [
+            {"child_id": child_id, "points": points, "timestamp": timestamp}
+            for points, timestamp in entries
+        ],
+    )
+
+
+def test_checkpoint_covers_lower_ids_with_later_timestamps(app, family):
+    child_id = family.child_ids[0]
+    old = datetime.utcnow() - timedelta(hours=1)
+    with app.app_context():
+        # id 2 was allocated before id 3 but committed with a recent timestamp
+        _ledger(child_id, (4, old), (10, datetime.utcnow()), (0, old))
+        db.session.commit()
+
+        assert PointsCheckpoint.write_checkpoints(min_entries=1) == 1
+        db.session.commit()
+        checkpoint = PointsCheckpoint.nearest(child_id)
+        assert checkpoint.balance == 14
+        assert compute_balance(child_id) == 14
+
+        _ledger(child_id, (1, old))
+        db.session.commit()
+        assert PointsCheckpoint.write_checkpoints(min_entries=1) == 1
+        db.session.commit()
+        assert PointsCheckpoint.nearest(child_id).balance == 15
+        assert compute_balance(child_id) == 15
+
+
+def test_checkpoint_stops_before_unsettled_tail(app, family):
+    child_id = family.child_ids[0]
+    old = datetime.utcnow() - timedelta(hours=1)
+    with app.app_context():
+        _ledger(child_id, (4, old), (10, datetime.utcnow()))
+        db.session.commit()
+
+        assert PointsCheckpoint.write_checkpoints(min_entries=1) == 1
+        db.session.commit()
+        assert PointsCheckpoint.nearest(child_id).balance == 4
+        assert compute_balance(child_id) == 14
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+import pytest
+from core.app.extensions import db
+from core.app.models.points import PointsTransaction
+from tests.conftest import login
+
+
+@pytest.fixture
+def parent_client(client, family):
+    login(client, family.parent_email)
+    return client
+
+
+def test_cursor_pages_through_whole_history(app, parent_client, family):
+    child_id = family.child_ids[0]
+    now = datetime.utcnow()
+    # Two pairs share a timestamp, so pages must also order by id
+    timestamps = [now, now, now - timedelta(minutes=1), now - timedelta(minutes=1)]
+    timestamps.append(now - timedelta(minutes=2))
+    with app.app_context():
+        db.session.execute(
+            db.insert(PointsTransaction),
+            [
+                {"child_id": child_id, "points": points, "timestamp": timestamp}
+                for points, timestamp in enumerate(timestamps, start=1)
+            ],
+        )
+        db.session.commit()
+
+    seen = []
+    cursor = None
+    for _ in range(len(timestamps)):
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = parent_client.get(
+            f"/parent/children/{child_id}/points", query_string=params
+        )
+        assert response.status_code == 200
+        data = response.get_json()["data"]
+        seen.extend(entry["points"] for entry in data["entries"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [2, 1, 4, 3, 5]
+
+
+def test_invalid_cursor_is_rejected(parent_client, family):
+    response = parent_client.get(
+        f"/parent/children/{family.child_ids[0]}/points",
+        query_string={"cursor": "not-a-cursor"},
+    )
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid cursor"
@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from core.app.extensions import db
+from tests.conftest import login, make_family
+
+SIZES = (1, 6)
+
+
+@contextmanager
+def count_statements(app):
+    with app.app_context():
+        engine = db.engine
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _statements(app, email, url):
+    client = app.test_client()
+    login(client, email)
+    client.get(url)  # warm the identity cache
+    with count_statements(app) as statements:
+        assert client.get(url).status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/parent/children",
+        "/parent/api/children",
+        "/parent/api/profile",
+        "/parent/api/dashboard",
+        "/parent/children/{child_id}",
+        "/parent/api/children/{child_id}",
+    ],
+)
+def test_parent_endpoints_do_not_scale_with_family_size(app, url):
+    counts = []
+    for size in SIZES:
+        family = make_family(app, f"parent{size}", children=size)
+        counts.append(
+            _statements(
+                app, family.parent_email, url.format(child_id=family.child_ids[-1])
+            )
+        )
+    assert counts[0] == counts[1]
+
+
+@pytest.mark.parametrize("url", ["/child/api/profile", "/child/api/parent"])
+def test_child_endpoints_do_not_scale_with_family_size(app, url):
+    counts = []
+    for size in SIZES:
+        make_family(app, f"parent{size}", children=size)
+        counts.append(_statements(app, f"parent{size}-child0@example.com", url))
+    assert counts[0] == counts[1]
@@ -0,0 +1,44 @@
+import pytest
+from core.app import create_app
+from core.app.config import TestingConfig
+
+
+@pytest.fixture
+def limited_app(monkeypatch):
+    monkeypatch.setattr(TestingConfig, "AUTH_RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(TestingConfig, "AUTH_RATE_LIMIT_IP_BURST", 1)
+    monkeypatch.setattr(TestingConfig, "AUTH_RATE_LIMIT_IP_PER_MINUTE", 0)
+    monkeypatch.setattr(TestingConfig, "TRUSTED_PROXY_HOPS", 1)
+    return create_app("testing")
+
+
+def _login(client, forwarded_for):
+    return client.post(
+        "/auth/api/login",
+        json={"email": "nobody@example.com", "password": "pw"},
+        headers={"X-Forwarded-For": forwarded_for},
+    )
+
+
+def test_ip_bucket_is_keyed_on_forwarded_address(limited_app):
+    client = limited_app.test_client()
+
+    assert _login(client, "203.0.113.1").status_code == 401
+    assert _login(client, "203.0.113.1").status_code == 429
+    # Same proxy, different client
+    assert _login(client, "203.0.113.2").status_code == 401
+
+
+def test_forwarded_address_ignored_without_trusted_hops(limited_app, monkeypatch):
+    monkeypatch.setattr(TestingConfig, "TRUSTED_PROXY_HOPS", 0)
+    client = create_app("testing").test_client()
+
+    assert _login(client, "203.0.113.1").status_code == 401
+    assert _login(client, "203.0.113.2").status_code == 429
+
+
+def test_json_array_body_is_rejected_not_crashed(limited_app):
+    client = limited_app.test_client()
+
+    response = client.post("/auth/api/login", json=["email"])
+    assert response.status_code == 400
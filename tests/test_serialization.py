@@ -0,0 +1,38 @@
+import json
+from core.app.extensions import db
+from core.app.models.user import User, serialize_user, serialize_users
+from tests.conftest import PASSWORD
+
+
+def _roundtrip(app, value):
+    return json.loads(app.json.dumps(value))
+
+
+def _users(family):
+    orphan = User(
+        username="orphan", email="orphan@example.com", role="child", parent_id=None
+    )
+    orphan.set_password(PASSWORD)
+    db.session.add(orphan)
+    db.session.commit()
+    parent = db.session.get(User, family.parent_id)
+    child = db.session.get(User, family.child_ids[0])
+    return [parent, child, orphan]
+
+
+def test_serialize_user_matches_to_dict(app, family):
+    with app.app_context():
+        users = _users(family)
+        assert users[2].parent is None
+        for user in users:
+            assert _roundtrip(app, serialize_user(user)) == _roundtrip(
+                app, user.to_dict()
+            )
+
+
+def test_serialize_users_matches_to_dict(app, family):
+    with app.app_context():
+        users = _users(family)
+        expected = _roundtrip(app, [user.to_dict() for user in users])
+        assert json.loads(serialize_users(users).json) == expected
+        assert _roundtrip(app, {"users": serialize_users(users)}) == {"users": expected}
@@ -0,0 +1,10 @@
+"""Production entry point: ``gunicorn -c gunicorn.conf.py wsgi:app``.
+
+``run.py`` is the development server; this module builds the app with the
+production config (override with FLASK_CONFIG) and never starts a server.
+"""
+
+import os
+from core.app import create_app
+
+app = create_app(os.environ.get("FLASK_CONFIG") or "production")